@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from crawler.analysis import analyze_headers
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 3_000_000]
+
+def synthetic_headers(rows, headers_per_page=4, vocabulary=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    page_urls = pd.Categorical.from_codes(
+        np.arange(rows) // headers_per_page,
+        categories=[f"https://example.com/page/{page}" for page in range(-(-rows // headers_per_page))]
+    )
+    texts = np.array([f"Heading {word}" for word in range(vocabulary)] + [f"  heading   {word} " for word in range(vocabulary)], dtype=object)
+    return pd.DataFrame({'Page URL': page_urls, 'H2 Text': texts[rng.integers(0, len(texts), rows)]})
+
+def legacy_analyze_headers(headers, text_column, section_name):
+    headers_df = pd.DataFrame(headers)
+    headers_df['Normalized Text'] = headers_df[text_column].apply(lambda text: ' '.join(str(text).strip().lower().split()))
+    headers_df['Duplicate Key'] = headers_df['Normalized Text'] + headers_df['Page URL'].astype(str)
+    duplicate_counts = headers_df['Duplicate Key'].value_counts()
+    headers_df['Duplicate Status'] = headers_df['Duplicate Key'].apply(
+        lambda x: "Duplicate Found" if duplicate_counts[x] > 1 else "No Duplicate"
+    )
+    headers_df.drop(columns=['Normalized Text', 'Duplicate Key'], inplace=True)
+    url_counts = headers_df['Page URL'].value_counts()
+    headers_df[f'{section_name} Multiple'] = headers_df['Page URL'].map(lambda url: 'Multiple' if url_counts[url] > 1 else 'Not Multiple')
+    return headers_df
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_analysis', description="Benchmark duplicate/multiple header analysis against the per-row implementation.")
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES, help="Header row counts to benchmark")
+    parser.add_argument('--legacy-max', type=int, default=1_000_000, help="Largest row count to also run the per-row implementation on")
+    options = parser.parse_args(argv)
+    print(f"{'rows':>10} {'vectorized s':>13} {'rows/s':>12} {'per-row s':>10} {'speedup':>8}")
+    for rows in options.sizes:
+        headers = synthetic_headers(rows)
+        result, vectorized_seconds = timed(analyze_headers, headers, 'H2 Text', 'H2')
+        legacy_column = ''
+        if rows <= options.legacy_max:
+            expected, legacy_seconds = timed(legacy_analyze_headers, headers.astype({'Page URL': str}), 'H2 Text', 'H2')
+            for column in ('Duplicate Status', 'H2 Multiple'):
+                if not np.array_equal(result[column].to_numpy(), expected[column].to_numpy()):
+                    raise SystemExit(f"{column} differs from the per-row implementation at {rows} rows")
+            legacy_column = f"{legacy_seconds:>10.2f} {legacy_seconds / vectorized_seconds:>7.1f}x"
+        print(f"{rows:>10} {vectorized_seconds:>13.3f} {rows / vectorized_seconds:>12,.0f} {legacy_column}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .synthetic_site import SITE_DEFAULTS, serve_forever, site_config
+
+SCENARIOS = ['crawl', 'sitemap', 'export']
+COMPARED_METRICS = ['pages_per_second', 'latency_p50_ms', 'latency_p99_ms', 'peak_rss_mb', 'cpu_seconds']
+HIGHER_IS_BETTER = frozenset(['pages_per_second'])
+DEFAULT_TOLERANCE = 0.10
+
+def resource_usage():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    rss_unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    cpu_seconds = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    return cpu_seconds, max(own.ru_maxrss, children.ru_maxrss) / rss_unit
+
+def run_scenario(scenario, base_url, parse_workers=0, check_links=True, polite=False):
+    from crawler import CrawlMetrics, crawl_website, process_url
+    from crawler.http_client import set_request_metrics
+    from crawler.politeness import use_politeness
+    from crawler.report import build_export_sheets, write_csv_zip, write_excel
+    metrics = CrawlMetrics()
+    cpu_before, _ = resource_usage()
+    started = time.perf_counter()
+    if scenario == 'crawl':
+        set_request_metrics(metrics)
+        use_politeness(polite)
+        pages = len(crawl_website(base_url + '/'))
+    else:
+        data = process_url(base_url + '/sitemap.xml', "Sitemap URL", check_links=check_links, parse_workers=parse_workers, metrics=metrics,
+                           politeness=polite)
+        if 'error' in data:
+            raise RuntimeError(data['error'])
+        pages = len(data['pages'])
+        if scenario == 'export':
+            # Only the export is timed; the crawl that produces its input is setup.
+            cpu_before, _ = resource_usage()
+            started = time.perf_counter()
+            with tempfile.TemporaryDirectory() as directory:
+                sheets = build_export_sheets(data)
+                write_excel(sheets, os.path.join(directory, 'export.xlsx'))
+                write_csv_zip(sheets, os.path.join(directory, 'export.zip'))
+    seconds = time.perf_counter() - started
+    cpu_after, peak_rss_mb = resource_usage()
+    snapshot = metrics.snapshot()
+    latency = snapshot['request_timings']['ttfb']
+    measured_requests = scenario != 'export'
+    return {
+        'pages': pages,
+        'seconds': seconds,
+        'pages_per_second': pages / seconds if seconds else 0.0,
+        'requests': snapshot['requests'] if measured_requests else None,
+        'latency_p50_ms': latency['p50'] * 1000 if measured_requests else None,
+        'latency_p99_ms': latency['p99'] * 1000 if measured_requests else None,
+        'peak_rss_mb': peak_rss_mb,
+        'cpu_seconds': cpu_after - cpu_before,
+    }
+
+def start_site(context, config):
+    ready = context.Queue()
+    server = context.Process(target=serve_forever, args=(config, '127.0.0.1', 0, ready), name='synthetic site', daemon=True)
+    server.start()
+    return server, f"http://127.0.0.1:{ready.get(timeout=60)}"
+
+def run_benchmarks(config, scenarios=SCENARIOS, repeat=1, parse_workers=0, check_links=True, polite=False):
+    context = multiprocessing.get_context('spawn')
+    server, base_url = start_site(context, config)
+    results = {}
+    try:
+        for scenario in scenarios:
+            runs = []
+            for _ in range(repeat):
+                # A fresh process per run keeps peak RSS and CPU time from leaking between scenarios.
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(run_scenario, scenario, base_url, parse_workers, check_links, polite).result())
+            median = statistics.median_low(run['pages_per_second'] for run in runs)
+            results[scenario] = next(run for run in runs if run['pages_per_second'] == median)
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    regressions = []
+    for scenario, result in results.items():
+        previous = baseline.get('results', {}).get(scenario)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            current, before = result.get(metric), previous.get(metric)
+            if not current or not before:
+                continue
+            change = (current - before) / before
+            if (-change if metric in HIGHER_IS_BETTER else change) > tolerance:
+                regressions.append(f"{scenario} {metric}: {before:.2f} -> {current:.2f} ({change:+.1%})")
+    return regressions
+
+def format_latency(value):
+    return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+def print_results(results):
+    print(f"{'scenario':>10} {'pages':>8} {'seconds':>9} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rss MB':>8} {'cpu s':>8}")
+    for scenario, result in results.items():
+        print(f"{scenario:>10} {result['pages']:>8} {result['seconds']:>9.2f} {result['pages_per_second']:>9.1f} "
+              f"{format_latency(result['latency_p50_ms'])} {format_latency(result['latency_p99_ms'])} "
+              f"{result['peak_rss_mb']:>8.1f} {result['cpu_seconds']:>8.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_crawl', description="Benchmark crawling, sitemap processing and export against a local synthetic site.")
+    parser.add_argument('--scenario', dest='scenarios', action='append', choices=SCENARIOS, help="Scenario to run; repeat for several (default: all)")
+    for field, default in SITE_DEFAULTS.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default, help=f"Synthetic site {field.replace('_', ' ')} (default: {default})")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scenario; the run with the median pages/s is reported")
+    parser.add_argument('--parse-workers', type=int, default=0, help="Parse processes for the sitemap and export scenarios")
+    parser.add_argument('--skip-link-check', action='store_true', help="Do not check page links in the sitemap and export scenarios")
+    parser.add_argument('--polite', action='store_true', help="Keep the per-host rate limit and robots.txt checks enabled")
+    parser.add_argument('-o', '--output', help="Write the results as JSON to this path")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Relative change that counts as a regression")
+    options = parser.parse_args(argv)
+    config = site_config(**{field: getattr(options, field) for field in SITE_DEFAULTS})
+    results = run_benchmarks(config, options.scenarios or SCENARIOS, max(1, options.repeat), options.parse_workers, not options.skip_link_check, options.polite)
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+        'site': config,
+        'settings': {'repeat': options.repeat, 'parse_workers': options.parse_workers, 'check_links': not options.skip_link_check, 'polite': options.polite},
+        'results': results,
+    }
+    print_results(results)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), options.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
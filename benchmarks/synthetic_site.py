@@ -0,0 +1,172 @@
+import argparse
+import gzip
+import hashlib
+import http.server
+import threading
+import time
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+SITE_DEFAULTS = {
+    'pages': 1_000,
+    'fan_out': 5,
+    'images_per_page': 3,
+    'max_image_kb': 300,
+    'sitemap_size': 500,
+    'redirect_percent': 5,
+    'broken_percent': 5,
+    'slow_percent': 2,
+    'slow_ms': 200,
+    'trap_depth': 50,
+    'seed': 0,
+}
+
+def site_config(**overrides):
+    unknown = set(overrides) - set(SITE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown site options: {', '.join(sorted(unknown))}")
+    return dict(SITE_DEFAULTS, **overrides)
+
+def page_hash(config, *parts):
+    key = ':'.join(map(str, (config['seed'],) + parts)).encode('ascii')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+def percent_hit(config, kind, page, percent):
+    return page_hash(config, kind, page) % 100 < percent
+
+def page_links(config, page):
+    # Children page*fan_out+1.. make every page reachable from the root, like a site tree.
+    links = [f"/p/{child}" for child in range(page * config['fan_out'] + 1, page * config['fan_out'] + config['fan_out'] + 1) if child < config['pages']]
+    links.append(f"/p/{page_hash(config, 'random', page) % config['pages']}")
+    if page:
+        links.append(f"/p/{(page - 1) // config['fan_out']}")
+    if percent_hit(config, 'redirect', page, config['redirect_percent']):
+        links.append(f"/r/{page_hash(config, 'target', page) % config['pages']}")
+    if percent_hit(config, 'broken', page, config['broken_percent']):
+        links.append(f"/missing/{page}")
+    if page == 0 and config['trap_depth']:
+        links.append("/trap/0")
+    return links
+
+def image_size(config, image):
+    return (page_hash(config, 'image', image) % config['max_image_kb'] + 1) * 1024
+
+def page_html(config, page):
+    title = f"Synthetic page {page}" if page % 7 else "Short"
+    description = '' if page % 4 == 0 else f'<meta name="description" content="Description of synthetic page {page % 50}">'
+    links = ''.join(f'<a href="{link}">Link {index}</a>' for index, link in enumerate(page_links(config, page)))
+    images = ''.join(f'<img src="/img/{(page + index) % 1000}.png" alt="{"" if index == 0 else "Image"}">' for index in range(config['images_per_page']))
+    text = ' '.join(f"word{page_hash(config, 'text', page, index) % 500}" for index in range(80))
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><title>{title}</title>{description}</head>'
+        f'<body><h1>Heading {page}</h1><h2>Section A</h2><h2>Section {page % 3}</h2><p>{text}</p>{links}{images}</body></html>'
+    ).encode('utf-8')
+
+def trap_html(depth):
+    # An endless-calendar style trap: each page links one level deeper with a fresh session id.
+    return (
+        f'<html><head><title>Archive {depth}</title></head><body><h1>Archive {depth}</h1>'
+        f'<a href="/trap/{depth + 1}">Next</a><a href="/trap/{depth + 1}?sid={depth * 7919 % 10007}">Next (session)</a></body></html>'
+    ).encode('utf-8')
+
+def sitemap_count(config):
+    return -(-config['pages'] // config['sitemap_size'])
+
+def sitemap_name(index):
+    # Alternate plain and gzipped child sitemaps so both code paths are exercised.
+    return f"/sitemaps/{index}.xml.gz" if index % 2 else f"/sitemaps/{index}.xml"
+
+def sitemap_index(config, base):
+    entries = ''.join(f"<sitemap><loc>{base}{sitemap_name(index)}</loc></sitemap>" for index in range(sitemap_count(config)))
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NAMESPACE}">{entries}</sitemapindex>'.encode('utf-8')
+
+def sitemap_urlset(config, base, index):
+    pages = range(index * config['sitemap_size'], min(config['pages'], (index + 1) * config['sitemap_size']))
+    entries = ''.join(f"<url><loc>{base}/p/{page}</loc><lastmod>2024-01-{page % 28 + 1:02d}</lastmod></url>" for page in pages)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NAMESPACE}">{entries}</urlset>'.encode('utf-8')
+
+class SyntheticSiteHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = SITE_DEFAULTS
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def send_body(self, status, body=b'', content_type='text/html; charset=utf-8', headers=(), head=False, length=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body) if length is None else length))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def respond(self, head):
+        config = self.config
+        path, _, _ = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        base = f"http://{self.headers['Host']}"
+        if path == '/':
+            return self.send_body(301, headers=[('Location', '/p/0')], head=head)
+        if path == '/robots.txt':
+            return self.send_body(200, b"User-agent: *\nDisallow: /private\n", 'text/plain', head=head)
+        if path == '/sitemap.xml':
+            return self.send_body(200, sitemap_index(config, base), 'application/xml', head=head)
+        if parts[0] == 'sitemaps' and len(parts) == 2 and parts[1].split('.')[0].isdigit():
+            index = int(parts[1].split('.')[0])
+            if index >= sitemap_count(config) or path != sitemap_name(index):
+                return self.send_body(404, head=head)
+            body = sitemap_urlset(config, base, index)
+            return self.send_body(200, gzip.compress(body) if parts[1].endswith('.gz') else body, 'application/xml', head=head)
+        if parts[0] == 'p' and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) < config['pages']:
+            page = int(parts[1])
+            if percent_hit(config, 'slow', page, config['slow_percent']):
+                time.sleep(config['slow_ms'] / 1000)
+            return self.send_body(200, page_html(config, page), head=head)
+        if parts[0] == 'r' and len(parts) == 2 and parts[1].isdigit():
+            return self.send_body(301, headers=[('Location', f'/p/{parts[1]}')], head=head)
+        if parts[0] == 'trap' and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) < config['trap_depth']:
+            return self.send_body(200, trap_html(int(parts[1])), head=head)
+        if parts[0] == 'img' and len(parts) == 2:
+            size = image_size(config, parts[1])
+            # HEAD answers with the size only, so the crawler's image probe never downloads the body.
+            return self.send_body(200, b'' if head else bytes(size), 'image/png', head=head, length=size)
+        self.send_body(404, head=head)
+
+def create_server(config, host='127.0.0.1', port=0):
+    handler = type('ConfiguredSiteHandler', (SyntheticSiteHandler,), {'config': config})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_server(config, host='127.0.0.1', port=0):
+    server = create_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name='synthetic site', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def serve_forever(config, host, port, ready):
+    server = create_server(config, host, port)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic_site', description="Serve a generated site for crawl benchmarks.")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--host', default='127.0.0.1')
+    for field, default in SITE_DEFAULTS.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    options = vars(parser.parse_args(argv))
+    host, port = options.pop('host'), options.pop('port')
+    server = create_server(site_config(**options), host, port)
+    print(f"Serving {options['pages']} pages on http://{host}:{server.server_address[1]}/")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
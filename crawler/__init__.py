@@ -0,0 +1,46 @@
+from .checkpoint import CrawlCheckpoint, checkpoint_path_for
+from .crawl import crawl_website, iter_crawl_website
+from .distributed import MemoryFrontier, SqliteFrontier, distributed_process_url
+from .extract import (
+    ImageSizeProbe,
+    analyze_page,
+    check_link_status,
+    extract_headers,
+    extract_images,
+    extract_meta_data,
+    link_status_cache,
+)
+from .htmlparse import HtmlExtractor, extract_html
+from .http_client import (
+    disable_response_cache,
+    enable_response_cache,
+    http_get,
+    http_head,
+)
+from .jobs import JobRunner, JobStore
+from .linkcache import LinkStatusCache
+from .linkcheck import LinkChecker, check_page_links
+from .metrics import CrawlMetrics, prometheus_text, write_metrics
+from .pipeline import PagePipeline
+from .politeness import PolitenessScheduler, disable_politeness, enable_politeness
+from .process import (
+    diff_crawl_pages,
+    iter_process_url,
+    load_crawl_results,
+    process_url,
+    resume_crawl,
+    save_crawl_results,
+    serializable_results,
+)
+from .progress import CrawlProgress
+from .results import ResultStore
+from .robots import RobotsCache, is_crawl_allowed
+from .sitemap import (
+    fetch_page_urls,
+    fetch_sitemap,
+    fetch_sitemap_urls,
+    fetch_tag_pages,
+    iter_sitemap_entries,
+    iter_sitemap_urls,
+)
+from .urls import is_tag_page, is_valid_url, normalize_url
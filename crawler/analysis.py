@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+from .neardup import MINHASH_PERMUTATIONS, current_signature, decode_signatures, metadata_signature, near_duplicate_groups
+from .results import PAGE_ERROR_STATUSES, RESULT_TABLES
+
+TITLE_MIN_LENGTH = 30
+DESCRIPTION_MIN_LENGTH = 50
+
+SECTION_COLUMNS = {
+    "meta_data": ["Input URL", "Page URL", "Meta Title", "Meta Description", "Language"],
+    "headers_h1": RESULT_TABLES["headers_h1"],
+    "headers_h2": RESULT_TABLES["headers_h2"],
+    "images_missing_alt": RESULT_TABLES["images_missing_alt"],
+    "images_over_100kb": RESULT_TABLES["images_over_100kb"],
+    "page_status": ["Page URL", "Status"],
+    "meta_titles_all": ["Page URL", "Meta Title"],
+    "meta_titles_missing": ["Page URL", "Meta Title"],
+    "meta_titles_below_30": ["Page URL", "Meta Title"],
+    "meta_descriptions_all": ["Page URL", "Meta Description"],
+    "meta_descriptions_missing": ["Page URL", "Meta Description"],
+    "meta_descriptions_below_50": ["Page URL", "Meta Description"],
+    "tag_pages": RESULT_TABLES["tag_pages"],
+    "meta_titles_duplicate": ["Meta Title", "Page URL"],
+    "meta_descriptions_duplicate": ["Meta Description", "Page URL"],
+    "near_duplicates": ["Field", "Cluster", "Page URL", "Similar To", "Similarity"],
+    "broken_links": RESULT_TABLES["broken_links"],
+}
+HEADER_ANALYSIS_COLUMNS = {
+    "h1_analysis": ["Page URL", "H1 Text", "Duplicate Status", "H1 Multiple"],
+    "h2_analysis": ["Page URL", "H2 Text", "Duplicate Status", "H2 Multiple"],
+}
+
+def as_category(series):
+    return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+
+def group_sizes(codes):
+    codes = pd.Series(codes)
+    return codes.groupby(codes, sort=False, dropna=False).transform('size').to_numpy()
+
+def normalized_codes(series):
+    text = as_category(series)
+    normalized = text.cat.categories.astype(str).str.lower().str.split().str.join(' ')
+    category_codes = pd.factorize(normalized)[0]
+    codes = text.cat.codes.to_numpy()
+    return np.where(codes >= 0, category_codes[codes], -1)
+
+def category_lengths(values):
+    lengths = np.asarray(values.cat.categories.astype(str).str.len(), dtype=np.int64)
+    codes = values.cat.codes.to_numpy()
+    return pd.Series(np.where(codes >= 0, lengths[codes] if len(lengths) else 0, 0), index=values.index)
+
+def duplicate_status(df, text_column):
+    page_codes = as_category(df['Page URL']).cat.codes.to_numpy().astype(np.int64)
+    text_codes = normalized_codes(df[text_column]).astype(np.int64)
+    sizes = group_sizes(page_codes * (text_codes.max(initial=0) + 2) + text_codes + 1)
+    return np.where(sizes > 1, "Duplicate Found", "No Duplicate")
+
+def multiple_status(df):
+    sizes = group_sizes(as_category(df['Page URL']).cat.codes.to_numpy())
+    return np.where(sizes > 1, 'Multiple', 'Not Multiple')
+
+def analyze_headers(headers, text_column, section_name):
+    headers_df = pd.DataFrame(headers).copy()
+    headers_df['Duplicate Status'] = duplicate_status(headers_df, text_column)
+    headers_df[f'{section_name} Multiple'] = multiple_status(headers_df)
+    return headers_df
+
+def duplicated_within(values, mask):
+    codes = as_category(values).cat.codes.where(mask, -1)
+    return mask & (group_sizes(codes) > 1)
+
+def page_flags(pages):
+    ok = ~pages["Status"].isin(PAGE_ERROR_STATUSES)
+    flags = {"ok": ok}
+    for prefix, column, min_length in (("title", "Meta Title", TITLE_MIN_LENGTH), ("description", "Meta Description", DESCRIPTION_MIN_LENGTH)):
+        values = as_category(pages[column])
+        present = ok & (values != 'N/A')
+        flags[f"{prefix}_present"] = present
+        flags[f"{prefix}_missing"] = ok & (values == 'N/A')
+        flags[f"{prefix}_short"] = present & (category_lengths(values) < min_length)
+        flags[f"{prefix}_duplicate"] = duplicated_within(values, present)
+    return pd.DataFrame(flags)
+
+def duplicate_rows(df, text_column):
+    first_seen = pd.factorize(df[text_column])[0]
+    return df.iloc[first_seen.argsort(kind='stable')]
+
+def closest_pages(clusters, matches, similarities):
+    # Each page is paired with another page with the same value if there is one, else with the LSH match it was grouped by.
+    pages_by_code = clusters.groupby('code', sort=False)['Page URL'].agg(list)
+    similar_to, similarity = [], []
+    for page_url, code in zip(clusters['Page URL'], clusters['code']):
+        same_value = pages_by_code[code]
+        if len(same_value) > 1:
+            similar_to.append(same_value[1] if same_value[0] == page_url else same_value[0])
+            similarity.append(1.0)
+        else:
+            similar_to.append(pages_by_code[matches[code]][0])
+            similarity.append(similarities[code])
+    return similar_to, np.asarray(similarity, dtype=float)
+
+def near_duplicate_clusters(field, page_urls, codes, signatures, min_values=1):
+    groups, matches, similarities = near_duplicate_groups(signatures)
+    groups = np.asarray(groups, dtype=np.int64)
+    clusters = pd.DataFrame({'Page URL': page_urls, 'code': codes, 'group': groups[codes]})
+    by_group = clusters.groupby('group', sort=False)['code']
+    clusters = clusters[(by_group.transform('size') > 1) & (by_group.transform('nunique') >= min_values)]
+    similar_to, similarity = closest_pages(clusters, matches, similarities)
+    return pd.DataFrame({
+        'Field': field,
+        'Cluster': pd.factorize(clusters['group'])[0] + 1,
+        'Page URL': clusters['Page URL'].to_numpy(),
+        'Similar To': similar_to,
+        'Similarity': similarity.round(2),
+    }, columns=SECTION_COLUMNS["near_duplicates"])
+
+def content_near_duplicates(fingerprints):
+    fingerprints = fingerprints[fingerprints['Content Signature'].map(current_signature).astype(bool)]
+    codes, signatures = pd.factorize(fingerprints['Content Signature'])
+    return near_duplicate_clusters('Content', fingerprints['Page URL'].to_numpy(), codes, decode_signatures(list(signatures)))
+
+def metadata_near_duplicates(pages, column, present):
+    values = pages.loc[present, column].astype(str)
+    signatures = {value: metadata_signature(value) for value in values.unique()}
+    values = values[values.map(lambda value: signatures[value] is not None).astype(bool)]
+    codes, uniques = pd.factorize(values)
+    matrix = np.array([signatures[value] for value in uniques], dtype=np.uint32).reshape(len(uniques), MINHASH_PERMUTATIONS)
+    # Exact duplicates are already reported, so only clusters of differing values are kept.
+    return near_duplicate_clusters(column, pages.loc[values.index, 'Page URL'].to_numpy(), codes, matrix, min_values=2)
+
+def near_duplicate_rows(fingerprints, pages, flags):
+    clusters = [
+        content_near_duplicates(fingerprints),
+        metadata_near_duplicates(pages, "Meta Title", flags["title_present"]),
+        metadata_near_duplicates(pages, "Meta Description", flags["description_present"]),
+    ]
+    clusters = [frame for frame in clusters if not frame.empty]
+    return pd.concat(clusters, ignore_index=True) if clusters else pd.DataFrame(columns=SECTION_COLUMNS["near_duplicates"])
+
+def empty_analysis():
+    columns = {**SECTION_COLUMNS, **HEADER_ANALYSIS_COLUMNS}
+    return {name: pd.DataFrame(columns=section_columns) for name, section_columns in columns.items()}
+
+def analyze_results(results, input_url=None):
+    pages = results.frame("pages")
+    for column in ("Meta Title", "Meta Description", "Language"):
+        pages[column] = as_category(pages[column])
+    flags = page_flags(pages)
+    headers_h1 = results.frame("headers_h1")
+    headers_h2 = results.frame("headers_h2")
+    sections = {
+        "meta_data": pages[flags["ok"]].assign(**{"Input URL": input_url}),
+        "headers_h1": headers_h1,
+        "headers_h2": headers_h2,
+        "images_missing_alt": results.frame("images_missing_alt"),
+        "images_over_100kb": results.frame("images_over_100kb"),
+        "page_status": pages,
+        "meta_titles_all": pages[flags["title_present"]],
+        "meta_titles_missing": pages[flags["title_missing"]],
+        "meta_titles_below_30": pages[flags["title_short"]],
+        "meta_descriptions_all": pages[flags["description_present"]],
+        "meta_descriptions_missing": pages[flags["description_missing"]],
+        "meta_descriptions_below_50": pages[flags["description_short"]],
+        "tag_pages": results.frame("tag_pages"),
+        "meta_titles_duplicate": duplicate_rows(pages[flags["title_duplicate"]], "Meta Title"),
+        "meta_descriptions_duplicate": duplicate_rows(pages[flags["description_duplicate"]], "Meta Description"),
+        "near_duplicates": near_duplicate_rows(results.frame("content_fingerprints"), pages, flags),
+        "broken_links": results.frame("broken_links"),
+    }
+    analysis = {name: sections[name][columns].reset_index(drop=True) for name, columns in SECTION_COLUMNS.items()}
+    analysis["h1_analysis"] = analyze_headers(headers_h1, "H1 Text", "H1")
+    analysis["h2_analysis"] = analyze_headers(headers_h2, "H2 Text", "H2")
+    return analysis
+
+def build_sections(data):
+    results = data.get("results")
+    if results is None:
+        return empty_analysis()
+    if "analysis" not in results.cache:
+        results.cache["analysis"] = analyze_results(results, data.get("input_url"))
+    return results.cache["analysis"]
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .urls import normalize_url
+
+CHECKPOINT_DIR = os.environ.get('CRAWLER_CHECKPOINT_DIR', '.crawl_checkpoints')
+CHECKPOINT_FLUSH_INTERVAL = 5.0
+
+class CrawlCheckpoint:
+    def __init__(self, path, flush_interval=CHECKPOINT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+
+    def load(self):
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, 'rb+') as f:
+            offset = 0
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+        return records
+
+    def append(self, record):
+        with self.lock:
+            self.pending.append(json.dumps(record, separators=(',', ':')))
+            if time.time() - self.last_flush >= self.flush_interval:
+                self.write_pending()
+
+    def flush(self):
+        with self.lock:
+            self.write_pending()
+
+    def write_pending(self):
+        if self.pending:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self.pending) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending = []
+        self.last_flush = time.time()
+
+    def complete(self):
+        with self.lock:
+            self.pending = []
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+def checkpoint_path_for(input_url, input_type, checkpoint_dir=CHECKPOINT_DIR):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    key = hashlib.sha1(f"{input_type}|{normalize_url(input_url)}".encode('utf-8')).hexdigest()
+    return os.path.join(checkpoint_dir, f"{key}.jsonl")
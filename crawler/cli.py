@@ -0,0 +1,144 @@
+import argparse
+import os
+import re
+import sys
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from .checkpoint import CHECKPOINT_DIR, checkpoint_path_for
+from .distributed import distributed_process_url
+from .frontier import BLOOM_CAPACITY, BLOOM_ERROR_RATE
+from .extract import link_status_cache
+from .http_client import MAX_BODY_BYTES, enable_response_cache, set_max_body_bytes
+from .metrics import CrawlMetrics, profiled, write_metrics
+from .politeness import HOST_BURST, HOST_RATE_LIMIT
+from .process import load_crawl_results, process_url, save_crawl_results
+from .robots import is_crawl_allowed
+
+METRICS_EXTENSIONS = {'json': '.metrics.json', 'prometheus': '.prom'}
+INPUT_TYPES = {'auto': None, 'website': "Website URL", 'sitemap': "Sitemap URL"}
+
+def detect_input_type(url):
+    path = urlparse(url).path.lower()
+    if path.endswith('.xml') or path.endswith('.xml.gz'):
+        return "Sitemap URL"
+    return "Website URL"
+
+def output_name(url):
+    parsed = urlparse(url)
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', f"{parsed.netloc}{parsed.path}").strip('_') or 'site'
+
+def read_url_file(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def init_worker(cache_path, max_body_bytes, link_cache_path=None):
+    if cache_path:
+        enable_response_cache(cache_path)
+    if link_cache_path:
+        link_status_cache.persist_to(link_cache_path)
+    set_max_body_bytes(max_body_bytes)
+
+def worker_initargs(options):
+    return (options.cache, options.max_body_bytes, options.link_cache)
+
+def politeness_settings(options):
+    return {'rate': options.rate_limit, 'burst': options.host_burst, 'respect_robots': not options.ignore_robots}
+
+def run_site(url, input_type, options):
+    input_type = input_type or detect_input_type(url)
+    if not options.ignore_robots and not is_crawl_allowed(url):
+        return url, "disallowed by robots.txt"
+    base_path = os.path.join(options.output_dir, output_name(url))
+    previous_results = None
+    if options.incremental and os.path.exists(base_path + '.json'):
+        previous_results = load_crawl_results(base_path + '.json')
+    checkpoint_path = checkpoint_path_for(url, input_type, options.checkpoint_dir) if options.checkpoint else None
+    crawl_options = {'seen_mode': options.seen_set, 'bloom_capacity': options.bloom_capacity, 'bloom_error_rate': options.bloom_error_rate}
+    table_format = next((result_format for result_format in options.formats if result_format in ('parquet', 'csv')), None)
+    metrics = CrawlMetrics() if options.metrics else None
+    profile = profiled(base_path + '.prof') if options.profile else nullcontext()
+    with profile:
+        if options.distributed:
+            try:
+                data = distributed_process_url(url, input_type=input_type, workers=options.distributed, previous_results=previous_results,
+                                               results_path=base_path if table_format else None, results_format=table_format,
+                                               check_links=not options.skip_link_check, initializer=init_worker, initargs=worker_initargs(options),
+                                               politeness=politeness_settings(options), parse_workers=options.parse_workers)
+            except Exception as e:
+                data = {"error": str(e)}
+        else:
+            data = process_url(url, input_type=input_type, previous_results=previous_results, checkpoint_path=checkpoint_path, crawl_options=crawl_options,
+                               results_path=base_path if table_format else None, results_format=table_format, check_links=not options.skip_link_check,
+                               parse_workers=options.parse_workers, metrics=metrics, politeness=politeness_settings(options))
+    if 'error' in data:
+        return url, f"error: {data['error']}"
+    save_crawl_results(data, base_path + '.json')
+    for metrics_format in options.metrics if 'metrics' in data else ():
+        write_metrics(data['metrics'], base_path + METRICS_EXTENSIONS[metrics_format])
+    if 'xlsx' in options.formats or 'zip' in options.formats:
+        from .report import build_export_sheets, write_csv_zip, write_excel
+        data_dict = build_export_sheets(data)
+        if 'xlsx' in options.formats:
+            write_excel(data_dict, base_path + '.xlsx')
+        if 'zip' in options.formats:
+            write_csv_zip(data_dict, base_path + '.zip')
+    return url, f"ok, {len(data['results']['pages'])} pages"
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m crawler', description="Crawl websites or sitemaps and write SEO analysis results to disk.")
+    parser.add_argument('urls', nargs='*', help="Website or sitemap URLs to analyze")
+    parser.add_argument('-f', '--urls-file', help="File with one URL per line")
+    parser.add_argument('-t', '--input-type', choices=sorted(INPUT_TYPES), default='auto', help="Treat URLs as websites or sitemaps (default: by extension)")
+    parser.add_argument('-o', '--output-dir', default='crawl_results', help="Directory for result files")
+    parser.add_argument('--format', dest='formats', action='append', choices=['json', 'xlsx', 'zip', 'parquet', 'csv'],
+                        help="Output formats (json is always written; zip bundles the report sheets as CSV files; parquet and csv stream result tables into a directory per site)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Number of sites to crawl in parallel processes")
+    parser.add_argument('--distributed', type=int, default=0, metavar='N',
+                        help="Crawl each site with N worker processes sharing a host-partitioned frontier (see python -m crawler.cluster for multi-machine runs)")
+    parser.add_argument('--incremental', action='store_true', help="Reuse the previous results in the output directory and only re-analyze changed pages")
+    parser.add_argument('--checkpoint', action='store_true', help="Checkpoint crawls so an interrupted run resumes where it stopped")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR, help="Directory for checkpoint files")
+    parser.add_argument('--cache', help="Path of the on-disk HTTP response cache")
+    parser.add_argument('--link-cache', help="Path of the on-disk link-status cache shared between runs")
+    parser.add_argument('--max-body-bytes', type=int, default=MAX_BODY_BYTES, help="Stop reading HTML responses after this many decompressed bytes")
+    parser.add_argument('--seen-set', choices=['exact', 'bloom'], default='exact', help="Seen-URL storage: 64-bit fingerprints or a Bloom filter")
+    parser.add_argument('--bloom-capacity', type=int, default=BLOOM_CAPACITY, help="Expected number of URLs for the Bloom filter")
+    parser.add_argument('--bloom-error-rate', type=float, default=BLOOM_ERROR_RATE, help="False-positive rate of the Bloom filter")
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes that parse fetched pages while the fetch threads keep downloading (0 parses on the fetch threads)")
+    parser.add_argument('--metrics', action='append', choices=sorted(METRICS_EXTENSIONS),
+                        help="Record request and stage timings and write them as JSON or Prometheus text next to the results (also adds a Crawl Performance sheet)")
+    parser.add_argument('--profile', action='store_true', help="Run each crawl under cProfile and write the stats to a .prof file next to the results")
+    parser.add_argument('--skip-link-check', action='store_true', help="Do not check the links found on crawled pages for broken targets")
+    parser.add_argument('--ignore-robots', action='store_true', help="Do not check robots.txt or honour its Crawl-delay")
+    parser.add_argument('--rate-limit', type=float, default=HOST_RATE_LIMIT, help="Requests per second allowed per host; halved on 429/503 responses (0 disables rate limiting)")
+    parser.add_argument('--host-burst', type=int, default=HOST_BURST, help="Requests a host may receive in a burst before the rate limit applies")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    urls = list(options.urls)
+    if options.urls_file:
+        urls.extend(read_url_file(options.urls_file))
+    if not urls:
+        parser.error("no URLs given")
+    if options.distributed and options.metrics:
+        # Request timings are recorded in each worker process and never reach the coordinator.
+        parser.error("--metrics cannot be combined with --distributed")
+    options.formats = options.formats or ['json']
+    os.makedirs(options.output_dir, exist_ok=True)
+    input_type = INPUT_TYPES[options.input_type]
+    failed = False
+    with ProcessPoolExecutor(max_workers=max(1, options.jobs), initializer=init_worker, initargs=worker_initargs(options)) as executor:
+        futures = [executor.submit(run_site, url, input_type, options) for url in urls]
+        for future in futures:
+            url, message = future.result()
+            failed = failed or not message.startswith('ok')
+            print(f"{url}: {message}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import argparse
+import sys
+
+from .distributed import CLUSTER_AUTHKEY, DISTRIBUTED_WORKERS, distributed_process_url, is_loopback, parse_address, worker_main
+from .process import save_crawl_results
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m crawler.cluster', description="Crawl one site with several worker processes or machines sharing a host-partitioned frontier.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    coordinator = commands.add_parser('coordinator', help="Serve the frontier over TCP, wait for the workers and write the merged results")
+    coordinator.add_argument('url', help="Website or sitemap URL to analyze")
+    coordinator.add_argument('-t', '--input-type', choices=['website', 'sitemap'], default='website')
+    coordinator.add_argument('--scope', action='append', help="URL prefix to follow links into; repeat for several hosts (default: the start URL)")
+    coordinator.add_argument('--listen', default='127.0.0.1:5151', help="Address the frontier is served on")
+    coordinator.add_argument('--partitions', type=int, default=DISTRIBUTED_WORKERS, help="Number of host partitions, one per worker")
+    coordinator.add_argument('--local-workers', type=int, default=0, help="Worker processes to start on this machine (partitions 0..N-1)")
+    coordinator.add_argument('--authkey', default=CLUSTER_AUTHKEY, help="Shared secret for workers (default: CRAWLER_AUTHKEY); required unless every partition runs locally on a loopback address")
+    coordinator.add_argument('-o', '--output', default='crawl_results.json', help="Path of the merged JSON results")
+    worker = commands.add_parser('worker', help="Crawl one partition of a coordinator's frontier")
+    worker.add_argument('--connect', default='127.0.0.1:5151', help="Coordinator address")
+    worker.add_argument('--partition', type=int, required=True, help="Partition served by this worker")
+    worker.add_argument('--authkey', default=CLUSTER_AUTHKEY, help="Shared secret of the coordinator (default: CRAWLER_AUTHKEY)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    if options.command == 'worker':
+        if not options.authkey:
+            parser.error("workers need the coordinator's --authkey or CRAWLER_AUTHKEY")
+        worker_main(('tcp', parse_address(options.connect), options.authkey.encode()), options.partition)
+        return 0
+    address = parse_address(options.listen)
+    if not options.authkey and (not is_loopback(address[0]) or options.local_workers < options.partitions):
+        parser.error("--authkey or CRAWLER_AUTHKEY is required when the frontier listens beyond loopback or workers connect separately")
+    input_type = "Sitemap URL" if options.input_type == 'sitemap' else "Website URL"
+    data = distributed_process_url(options.url, input_type, workers=options.partitions, backend='tcp', scopes=options.scope,
+                                   address=address, authkey=options.authkey and options.authkey.encode(), local_workers=options.local_workers)
+    save_crawl_results(data, options.output)
+    print(f"{options.url}: ok, {len(data['pages'])} pages")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
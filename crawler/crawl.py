@@ -0,0 +1,73 @@
+import threading
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from .extract import read_html
+from .frontier import BLOOM_CAPACITY, BLOOM_ERROR_RATE, CrawlFrontier, UrlList, create_seen_set
+from .http_client import CRAWL_MAX_WORKERS, CRAWL_MAX_PER_HOST, UnsupportedContentType, http_get, release_http_connections, reserve_http_connections
+from .politeness import url_allowed
+from .urls import normalize_url
+
+def fetch_page_links(page_url, host_slot):
+    with host_slot:
+        return read_html(http_get(page_url, stream=True), fields={'links'})['links']
+
+def iter_crawl_website(root_url, max_workers=CRAWL_MAX_WORKERS, max_per_host=CRAWL_MAX_PER_HOST, checkpoint=None, records=None,
+                       seen_mode='exact', bloom_capacity=BLOOM_CAPACITY, bloom_error_rate=BLOOM_ERROR_RATE, cancel_event=None):
+    start_url = normalize_url(root_url)
+    frontier = CrawlFrontier(create_seen_set(seen_mode, capacity=bloom_capacity, error_rate=bloom_error_rate))
+    records = records or []
+    all_urls = UrlList(record['v'] for record in records if 'v' in record)
+    consumed = len(all_urls) + sum(1 for record in records if 'f' in record)
+    frontier.restore((record['q'] for record in records if 'q' in record), consumed)
+    if not frontier.seen:
+        frontier.push(start_url)
+        if checkpoint is not None:
+            checkpoint.append({'q': start_url})
+    in_flight = deque()
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(max_per_host))
+    reserve_http_connections(max_workers)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while frontier or in_flight:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            while frontier and len(in_flight) < max_workers * 2:
+                next_url = frontier.pop()
+                host_slot = host_slots[urlparse(next_url).netloc]
+                in_flight.append((next_url, executor.submit(fetch_page_links, next_url, host_slot)))
+            current_url, future = in_flight.popleft()
+            try:
+                hrefs = future.result()
+            except UnsupportedContentType:
+                # PDFs, images and other documents are listed as pages, but have no links to follow.
+                hrefs = []
+            except requests.exceptions.RequestException:
+                if checkpoint is not None:
+                    checkpoint.append({'f': current_url})
+                continue
+            all_urls.append(current_url)
+            if checkpoint is not None:
+                checkpoint.append({'v': current_url})
+            for href in hrefs:
+                full_url = normalize_url(urljoin(current_url, href)) 
+                if full_url.startswith(root_url) and full_url not in frontier.seen and url_allowed(full_url) and frontier.push(full_url):
+                    if checkpoint is not None:
+                        checkpoint.append({'q': full_url})
+            yield {'type': 'crawl', 'url': current_url, 'fetched': len(all_urls), 'queued': len(frontier) + len(in_flight)}
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        release_http_connections(max_workers)
+    return all_urls
+
+def crawl_website(root_url, **kwargs):
+    crawl = iter_crawl_website(root_url, **kwargs)
+    while True:
+        try:
+            next(crawl)
+        except StopIteration as stop:
+            # The packed UrlList stays inside the crawl; callers get the plain ordered list of URLs.
+            return list(stop.value)
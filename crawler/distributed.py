@@ -0,0 +1,361 @@
+import hashlib
+import ipaddress
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from urllib.parse import urlparse, urlunparse
+
+import requests
+
+from .extract import ImageSizeProbe
+from .http_client import CRAWL_MAX_PER_HOST, http_get, set_request_scheduler
+from .linkcheck import check_page_links
+from .pipeline import PARSE_WORKERS, PagePipeline
+from .politeness import url_allowed, use_politeness
+from .process import append_page_rows, diff_crawl_pages
+from .results import ResultStore
+from .sitemap import fetch_sitemap
+from .urls import is_tag_page, is_valid_url, normalize_url
+
+DISTRIBUTED_WORKERS = 4
+WORKER_BATCH = 16
+WORKER_POLL_INTERVAL = 0.2
+CLAIM_LEASE = 300.0
+CLUSTER_AUTHKEY = os.environ.get('CRAWLER_AUTHKEY')
+UNREPORTED_STATUSES = frozenset(['404', 'broken'])
+
+QUEUED, CLAIMED, DONE = 0, 1, 2
+
+def host_partition(url, partitions):
+    host = urlparse(url).netloc.lower()
+    return int.from_bytes(hashlib.blake2b(host.encode('utf-8'), digest_size=8).digest(), 'big') % partitions
+
+class SqliteFrontier:
+    def __init__(self, path, partitions=None, config=None, lease=CLAIM_LEASE):
+        self.path = path
+        self.lease = lease
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, partition INTEGER, state INTEGER, claimed_at REAL, page TEXT)'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS frontier_claim ON frontier (partition, state)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)')
+            if partitions is not None:
+                self.connection.execute("INSERT OR REPLACE INTO settings VALUES ('config', ?)", (json.dumps(dict(config or {}, partitions=partitions)),))
+        self.settings = self.config()
+
+    def config(self):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM settings WHERE name = 'config'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def add(self, urls):
+        partitions = self.settings['partitions']
+        with self.lock:
+            cursor = self.connection.executemany(
+                'INSERT OR IGNORE INTO frontier (url, partition, state) VALUES (?, ?, ?)',
+                ((url, host_partition(url, partitions), QUEUED) for url in urls)
+            )
+            return cursor.rowcount
+
+    def claim(self, partition, limit=WORKER_BATCH):
+        now = time.time()
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                urls = [row[0] for row in self.connection.execute(
+                    'SELECT url FROM frontier WHERE partition = ? AND (state = ? OR (state = ? AND claimed_at < ?)) LIMIT ?',
+                    (partition, QUEUED, CLAIMED, now - self.lease, limit)
+                )]
+                self.connection.executemany('UPDATE frontier SET state = ?, claimed_at = ? WHERE url = ?', ((CLAIMED, now, url) for url in urls))
+                self.connection.execute('COMMIT')
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+        return urls
+
+    def complete(self, url, page):
+        with self.lock:
+            self.connection.execute('UPDATE frontier SET state = ?, page = ? WHERE url = ?', (DONE, page, url))
+
+    def finished(self):
+        with self.lock:
+            return self.connection.execute('SELECT 1 FROM frontier WHERE state != ? LIMIT 1', (DONE,)).fetchone() is None
+
+    def pages(self):
+        with self.lock:
+            rows = self.connection.execute('SELECT url, page FROM frontier WHERE state = ? AND page IS NOT NULL ORDER BY rowid', (DONE,)).fetchall()
+        return rows
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.connection.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall())
+        return {'queued': counts.get(QUEUED, 0), 'claimed': counts.get(CLAIMED, 0), 'done': counts.get(DONE, 0)}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class MemoryFrontier:
+    def __init__(self, partitions, config=None, lease=CLAIM_LEASE):
+        self.settings = dict(config or {}, partitions=partitions)
+        self.lease = lease
+        self.lock = threading.Lock()
+        self.states = {}
+        self.queues = [[] for _ in range(partitions)]
+        self.claimed = {}
+        self.results = {}
+
+    def config(self):
+        return self.settings
+
+    def add(self, urls):
+        added = 0
+        with self.lock:
+            for url in urls:
+                if url not in self.states:
+                    self.states[url] = QUEUED
+                    self.queues[host_partition(url, self.settings['partitions'])].append(url)
+                    added += 1
+        return added
+
+    def claim(self, partition, limit=WORKER_BATCH):
+        now = time.time()
+        with self.lock:
+            urls = [url for url, (index, claimed_at) in self.claimed.items() if index == partition and claimed_at < now - self.lease][:limit]
+            queue = self.queues[partition]
+            taken = min(limit - len(urls), len(queue))
+            urls += queue[:taken]
+            del queue[:taken]
+            for url in urls:
+                self.states[url] = CLAIMED
+                self.claimed[url] = (partition, now)
+        return urls
+
+    def complete(self, url, page):
+        with self.lock:
+            self.states[url] = DONE
+            self.claimed.pop(url, None)
+            if page is not None:
+                self.results[url] = page
+
+    def finished(self):
+        with self.lock:
+            return not self.claimed and not any(self.queues)
+
+    def pages(self):
+        with self.lock:
+            return list(self.results.items())
+
+    def stats(self):
+        with self.lock:
+            return {'queued': sum(len(queue) for queue in self.queues), 'claimed': len(self.claimed), 'done': len(self.states) - sum(len(queue) for queue in self.queues) - len(self.claimed)}
+
+    def close(self):
+        pass
+
+class FrontierManager(BaseManager):
+    pass
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+def frontier_authkey(address, authkey=None):
+    # The manager protocol exchanges pickles, so whoever holds the key can run code in the coordinator.
+    authkey = authkey or (CLUSTER_AUTHKEY.encode() if CLUSTER_AUTHKEY else None)
+    if authkey:
+        return authkey
+    if not is_loopback(address[0]):
+        raise ValueError(f"Serving the frontier on {address[0]} requires an authkey (--authkey or CRAWLER_AUTHKEY)")
+    return os.urandom(32)
+
+def serve_frontier(frontier, address=('127.0.0.1', 0), authkey=None):
+    authkey = frontier_authkey(address, authkey)
+    FrontierManager.register('frontier', callable=lambda: frontier)
+    server = FrontierManager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name='frontier coordinator', daemon=True).start()
+    return server.address, authkey
+
+def connect_frontier(backend):
+    if backend[0] == 'sqlite':
+        return SqliteFrontier(backend[1])
+    FrontierManager.register('frontier')
+    manager = FrontierManager(address=tuple(backend[1]), authkey=backend[2])
+    manager.connect()
+    return manager.frontier()
+
+def in_scope(url, scopes):
+    return any(url.startswith(scope) for scope in scopes)
+
+def discovered_links(page, scopes):
+    links = (normalize_url(link) for link in page.get('links', ()))
+    return [link for link in dict.fromkeys(links) if in_scope(link, scopes) and is_valid_url(link) and url_allowed(link)]
+
+def reported_page(page):
+    # Mirrors the single-process crawl, which keeps the URLs that answered, non-HTML documents included.
+    if page['status'] in UNREPORTED_STATUSES:
+        return False
+    return page['status'] != '200_ok' or 'content_hash' in page
+
+def run_worker(frontier, partition, batch=WORKER_BATCH, threads=CRAWL_MAX_PER_HOST, poll_interval=WORKER_POLL_INTERVAL, parse_workers=PARSE_WORKERS):
+    config = frontier.config()
+    image_probe = ImageSizeProbe()
+    analyzed = 0
+    try:
+        # A site crawl keeps a single partition busy, so its worker parses pages in processes like process_url does.
+        with PagePipeline(fetch_workers=threads, parse_workers=parse_workers, image_probe=image_probe) as pipeline:
+            while True:
+                urls = frontier.claim(partition, batch)
+                if not urls:
+                    if frontier.finished():
+                        return analyzed
+                    time.sleep(poll_interval)
+                    continue
+                for url, page in pipeline.analyze((url, None, None) for url in urls):
+                    if config.get('follow_links'):
+                        frontier.add(discovered_links(page, config['scopes']))
+                    if reported_page(page):
+                        page['images_over_100kb'] = image_probe.oversized(url, page['image_urls'])
+                        frontier.complete(url, json.dumps(page))
+                    else:
+                        frontier.complete(url, None)
+                    analyzed += 1
+    finally:
+        image_probe.close()
+
+def worker_main(backend, partition, initializer=None, initargs=(), politeness=True, parse_workers=PARSE_WORKERS):
+    if initializer is not None:
+        initializer(*initargs)
+    use_politeness(politeness)
+    frontier = connect_frontier(backend)
+    try:
+        run_worker(frontier, partition, parse_workers=parse_workers)
+    finally:
+        frontier.close()
+
+def resolve_start_url(url):
+    # Like crawl_website, start from wherever the start URL redirects to.
+    try:
+        response = http_get(url, stream=True)
+    except requests.exceptions.RequestException:
+        return url
+    response.close()
+    return normalize_url(response.url)
+
+def redirected_scope(scope, final_url):
+    final = urlparse(final_url)
+    return urlunparse(urlparse(scope)._replace(scheme=final.scheme, netloc=final.netloc))
+
+def seed_frontier(input_url, input_type, scopes=None):
+    if input_type == "Sitemap URL":
+        page_urls, tag_pages, lastmods = fetch_sitemap(input_url)
+        page_urls = [normalize_url(url) for url in page_urls if is_valid_url(url) and url_allowed(url)]
+        tag_pages = [normalize_url(url) for url in tag_pages if is_valid_url(url) and url_allowed(url)]
+        return page_urls + tag_pages, tag_pages, lastmods, {'follow_links': False, 'scopes': []}
+    start_url = normalize_url(input_url)
+    final_url = resolve_start_url(start_url)
+    scopes = list(scopes or dict.fromkeys([input_url, redirected_scope(input_url, final_url)]))
+    return list(dict.fromkeys([start_url, final_url])), None, {}, {'follow_links': True, 'scopes': scopes}
+
+def collect_pages(frontier, lastmods):
+    pages = {}
+    for url, page in frontier.pages():
+        page = json.loads(page)
+        page['meta'] = tuple(page['meta'])
+        page['images_missing_alt'] = [tuple(image) for image in page['images_missing_alt']]
+        page['images_over_100kb'] = [tuple(image) for image in page['images_over_100kb']]
+        page['lastmod'] = lastmods.get(url)
+        pages[url] = page
+    return pages
+
+def merge_results(input_url, pages, tag_pages=None, previous_results=None, results_path=None, results_format=None, check_links=True):
+    results = ResultStore(results_path, results_format)
+    try:
+        if tag_pages is None:
+            tag_pages = [url for url in pages if is_tag_page(url)]
+        for tag_page in tag_pages:
+            results.append('tag_pages', tag_page)
+        for page_url, page in pages.items():
+            append_page_rows(results, page_url, page)
+        for page in pages.values():
+            for image in page['images_over_100kb']:
+                results.append('images_over_100kb', *image)
+        if check_links:
+            for broken_link in check_page_links(pages):
+                results.append('broken_links', *broken_link)
+    finally:
+        results.close()
+    previous_pages = (previous_results or {}).get('pages', {})
+    return {
+        "input_url": input_url,
+        "results": results,
+        "pages": pages,
+        "diff": diff_crawl_pages(previous_pages, pages) if previous_results else None
+    }
+
+def distributed_process_url(input_url, input_type="Website URL", workers=DISTRIBUTED_WORKERS, backend='sqlite', frontier_path=None, scopes=None,
+                            address=('127.0.0.1', 0), authkey=None, local_workers=None, initializer=None, initargs=(),
+                            previous_results=None, results_path=None, results_format=None, check_links=True, politeness=True,
+                            parse_workers=PARSE_WORKERS):
+    previous_scheduler = use_politeness(politeness)
+    try:
+        return run_distributed(input_url, input_type, workers, backend, frontier_path, scopes, address, authkey, local_workers,
+                               initializer, initargs, previous_results, results_path, results_format, check_links, politeness, parse_workers)
+    finally:
+        set_request_scheduler(previous_scheduler)
+
+def run_distributed(input_url, input_type, workers, backend, frontier_path, scopes, address, authkey, local_workers,
+                    initializer, initargs, previous_results, results_path, results_format, check_links, politeness, parse_workers):
+    seeds, tag_pages, lastmods, config = seed_frontier(input_url, input_type, scopes)
+    if backend == 'sqlite':
+        frontier_path = frontier_path or os.path.join(tempfile.mkdtemp(prefix='crawl-frontier-'), 'frontier.sqlite')
+        frontier = SqliteFrontier(frontier_path, partitions=workers, config=config)
+        worker_backend = ('sqlite', frontier_path)
+    elif backend == 'tcp':
+        frontier = MemoryFrontier(workers, config=config)
+        address, authkey = serve_frontier(frontier, address, authkey)
+        worker_backend = ('tcp', address, authkey)
+    else:
+        raise ValueError(f"Unknown frontier backend: {backend}")
+    frontier.add(seeds)
+    local_workers = workers if local_workers is None else local_workers
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        # Not daemonic, so each worker can start the page pipeline's parse processes.
+        context.Process(target=worker_main, args=(worker_backend, partition, initializer, initargs, politeness, parse_workers), name=f"crawl-partition-{partition}")
+        for partition in range(local_workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        while not frontier.finished():
+            # A worker only exits cleanly once the frontier is drained; nobody else claims a dead worker's partition.
+            # Partitions beyond local_workers are crawled by remote workers, which the coordinator cannot watch.
+            failed = next((process for process in processes if process.exitcode not in (None, 0)), None)
+            if failed is not None:
+                raise RuntimeError(f"Crawl worker {failed.name} exited with code {failed.exitcode} before the frontier was drained")
+            time.sleep(WORKER_POLL_INTERVAL)
+        for process in processes:
+            process.join()
+        pages = collect_pages(frontier, lastmods)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        frontier.close()
+    return merge_results(input_url, pages, tag_pages, previous_results, results_path, results_format, check_links)
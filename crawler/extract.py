@@ -0,0 +1,257 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from .htmlparse import ALL_FIELDS, HEAD_FIELDS, create_extractor, extract_html
+from .http_client import (
+    BodyStream,
+    UnsupportedContentType,
+    http_get,
+    http_head,
+    is_html_response,
+    observe_cache,
+    release_http_connections,
+    reserve_http_connections,
+    response_content_type,
+)
+from .linkcache import link_status_cache
+from .linkcheck import link_targets
+from .neardup import content_signature
+from .results import NON_HTML_STATUS
+from .urls import normalize_url
+
+def summarize_headers(h1, h2):
+    return {'H1': h1 or ["Missing"], 'H2': h2 or ["Missing"]}
+
+def check_html_response(response):
+    response.raise_for_status()
+    if not is_html_response(response):
+        raise UnsupportedContentType(f"Skipped {response_content_type(response)} content at {response.url}", response=response)
+
+def read_html(response, fields=ALL_FIELDS, max_bytes=None, digest=None):
+    body = BodyStream(response, max_bytes=max_bytes)
+    try:
+        check_html_response(response)
+        extractor = create_extractor(fields=fields, content_type=response.headers.get('Content-Type'))
+        for chunk in body:
+            if digest is not None:
+                digest.update(chunk)
+            if extractor.feed(chunk) and digest is None:
+                break
+    finally:
+        body.close()
+    return extractor.close()
+
+def read_html_body(response, max_bytes=None, digest=None):
+    body = BodyStream(response, max_bytes=max_bytes)
+    chunks = []
+    try:
+        check_html_response(response)
+        for chunk in body:
+            if digest is not None:
+                digest.update(chunk)
+            chunks.append(chunk)
+    finally:
+        body.close()
+    return b''.join(chunks)
+
+def fetch_html(page_url, fields):
+    return read_html(http_get(page_url, stream=True), fields=fields)
+
+def extract_meta_data(page_url):
+    try:
+        html = fetch_html(page_url, HEAD_FIELDS)
+        return html['title'], html['description'], html['lang']
+    except requests.exceptions.RequestException as e:
+        print(f"Request error: {e}")
+        return 'N/A', 'N/A', 'N/A'
+    except Exception as e:
+        print(f"Error processing the page: {e}")
+        return 'N/A', 'N/A', 'N/A'
+    
+def extract_headers(page_url):
+    html = fetch_html(page_url, {'h1', 'h2'})
+    return summarize_headers(html['h1'], html['h2'])
+
+IMAGE_PROBE_WORKERS = 8
+IMAGE_SIZE_LIMIT = 100 * 1024
+
+def probe_image_size(img_url):
+    response = http_head(img_url, allow_redirects=True)
+    content_length = response.headers.get('content-length')
+    if content_length is None:
+        response = http_get(img_url, headers={'Range': 'bytes=0-0'}, stream=True)
+        response.close()
+        content_range = response.headers.get('content-range', '')
+        total_size = content_range.rsplit('/', 1)[-1]
+        if response.status_code == 206 and total_size.isdigit():
+            return int(total_size)
+        content_length = response.headers.get('content-length')
+    return int(content_length or 0)
+
+class ImageSizeProbe:
+    def __init__(self, max_workers=IMAGE_PROBE_WORKERS):
+        self.max_workers = max_workers
+        reserve_http_connections(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.probes = {}
+        self.lock = threading.Lock()
+
+    def submit(self, img_urls):
+        with self.lock:
+            for img_url in img_urls:
+                key = normalize_url(img_url)
+                observe_cache('image_size', key in self.probes)
+                if key not in self.probes:
+                    self.probes[key] = self.executor.submit(probe_image_size, img_url)
+
+    def size(self, img_url):
+        key = normalize_url(img_url)
+        if key not in self.probes:
+            self.submit([img_url])
+        try:
+            return self.probes[key].result()
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+
+    def oversized(self, page_url, img_urls, limit=IMAGE_SIZE_LIMIT):
+        results = []
+        for img_url in img_urls:
+            img_size = self.size(img_url)
+            if img_size is not None and img_size > limit:
+                results.append((page_url, img_url, img_size))
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        release_http_connections(self.max_workers)
+
+def summarize_images(images, page_url):
+    images_missing_alt = []
+    img_urls = []
+    for img_url, alt_text in images:
+        if alt_text is None or len(alt_text) == 0:
+            images_missing_alt.append((page_url, img_url))
+        if img_url and img_url.startswith("http"):
+            img_urls.append(img_url)
+    return images_missing_alt, img_urls
+
+def probe_images(images_missing_alt, img_urls, page_url, image_probe=None):
+    probe = image_probe or ImageSizeProbe()
+    probe.submit(img_urls)
+    images_over_100kb = probe.oversized(page_url, img_urls)
+    if image_probe is None:
+        probe.close()
+    return images_missing_alt, images_over_100kb
+
+def extract_images(page_url):
+    html = fetch_html(page_url, {'images'})
+    images_missing_alt, img_urls = summarize_images(html['images'], page_url)
+    return probe_images(images_missing_alt, img_urls, page_url)
+
+def link_status_from_response(normalized_link, response):
+    status_code = response.status_code
+    redirect_url = response.headers.get('Location', '').strip()
+    if status_code in [301, 302]:
+        if normalize_url(redirect_url, add_trailing_slash=False) == normalized_link or \
+           normalize_url(redirect_url, add_trailing_slash=True) == normalized_link:
+            return '200_ok'
+        return f'redirect_{status_code}'
+    elif status_code == 200:
+        return '200_ok'
+    elif status_code == 404:
+        return '404'
+    return 'broken'
+
+def check_link_status(link):
+    normalized_link = normalize_url(link, add_trailing_slash=False)
+    status = link_status_cache.get(normalized_link)
+    if status is not None:
+        return status
+    try:
+        response = http_get(normalized_link, allow_redirects=False, timeout=5)
+        status = link_status_from_response(normalized_link, response)
+    except requests.exceptions.RequestException:
+        status = 'broken'
+    link_status_cache[normalized_link] = status
+    return status
+
+def empty_page():
+    return {'status': 'broken', 'meta': ('N/A', 'N/A', 'N/A'), 'headers': {'H1': ["Missing"], 'H2': ["Missing"]}, 'images_missing_alt': [], 'image_urls': []}
+
+def open_page(page, page_url):
+    normalized_link = normalize_url(page_url, add_trailing_slash=False)
+    cached_status = link_status_cache.get(normalized_link)
+    if cached_status is not None and cached_status != '200_ok':
+        # Redirects, missing and broken pages have no body to read, so a status checked within the TTL saves the request.
+        page['status'] = cached_status
+        return None
+    response = http_get(normalized_link, allow_redirects=False, timeout=5, stream=True)
+    page['status'] = link_status_from_response(normalized_link, response)
+    link_status_cache[normalized_link] = page['status']
+    if page['status'] != '200_ok':
+        response.close()
+        return None
+    if response.status_code != 200:
+        response.close()
+        response = http_get(page_url, stream=True)
+    if not is_html_response(response):
+        response.close()
+        page['status'] = NON_HTML_STATUS
+        return None
+    return response
+
+def page_request_failed(page_url, error):
+    link_status_cache.setdefault(normalize_url(page_url, add_trailing_slash=False), 'broken')
+    print(f"Request error: {error}")
+
+def page_html_fields(page_url, html):
+    images_missing_alt, image_urls = summarize_images(html['images'], page_url)
+    return {
+        'meta': (html['title'], html['description'], html['lang']),
+        'headers': summarize_headers(html['h1'], html['h2']),
+        'images_missing_alt': images_missing_alt,
+        'image_urls': image_urls,
+        'content_signature': content_signature(html['text']),
+        'links': link_targets(page_url, html['links']),
+    }
+
+def parse_page(page_url, body, content_type=None):
+    return page_html_fields(page_url, extract_html(body, content_type=content_type))
+
+def fetch_page(page_url, previous_page=None):
+    page = empty_page()
+    try:
+        response = open_page(page, page_url)
+        if response is None:
+            return page, None
+        content_type = response.headers.get('Content-Type')
+        digest = hashlib.sha256()
+        body = read_html_body(response, digest=digest)
+    except requests.exceptions.RequestException as e:
+        page_request_failed(page_url, e)
+        return page, None
+    page['content_hash'] = digest.hexdigest()
+    if previous_page is not None and previous_page.get('content_hash') == page['content_hash']:
+        return dict(previous_page, status=page['status']), None
+    return page, (body, content_type)
+
+def analyze_page(page_url, image_probe=None, previous_page=None):
+    page = empty_page()
+    try:
+        response = open_page(page, page_url)
+        if response is None:
+            return page
+        digest = hashlib.sha256()
+        html = read_html(response, digest=digest)
+    except requests.exceptions.RequestException as e:
+        page_request_failed(page_url, e)
+        return page
+    page['content_hash'] = digest.hexdigest()
+    if previous_page is not None and previous_page.get('content_hash') == page['content_hash']:
+        return dict(previous_page, status=page['status'])
+    page.update(page_html_fields(page_url, html))
+    if image_probe is not None:
+        image_probe.submit(page['image_urls'])
+    return page
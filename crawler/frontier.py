@@ -0,0 +1,138 @@
+import hashlib
+import math
+from array import array
+from collections import deque
+
+import numpy as np
+
+BLOOM_ERROR_RATE = 0.001
+BLOOM_CAPACITY = 1_000_000
+FINGERPRINT_SLOTS = 1 << 12
+
+def url_fingerprint(url):
+    # Zero marks an empty slot in FingerprintSet, so it is never a fingerprint.
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big') or 1
+
+class FingerprintSet:
+    # An open-addressing table of uint64 fingerprints, kept at most half full: about 16 bytes a URL instead of a boxed int in a set.
+    def __init__(self, slots=FINGERPRINT_SLOTS):
+        self.slots = np.zeros(max(8, 1 << (slots - 1).bit_length()), dtype=np.uint64)
+        self.count = 0
+
+    def find(self, fingerprint):
+        slots = self.slots
+        mask = len(slots) - 1
+        slot = fingerprint & mask
+        while True:
+            value = int(slots[slot])
+            if value == 0 or value == fingerprint:
+                return slot, value == fingerprint
+            slot = (slot + 1) & mask
+
+    def grow(self):
+        fingerprints = self.slots[self.slots != 0]
+        self.slots = np.zeros(len(self.slots) * 2, dtype=np.uint64)
+        for fingerprint in fingerprints.tolist():
+            self.slots[self.find(fingerprint)[0]] = fingerprint
+
+    def add(self, url):
+        fingerprint = url_fingerprint(url)
+        slot, found = self.find(fingerprint)
+        if found:
+            return False
+        self.slots[slot] = fingerprint
+        self.count += 1
+        if self.count * 2 > len(self.slots):
+            self.grow()
+        return True
+
+    def __contains__(self, url):
+        return self.find(url_fingerprint(url))[1]
+
+    def __len__(self):
+        return self.count
+
+class UrlList:
+    # Crawled URLs packed into one UTF-8 buffer with end offsets, instead of a Python string object per URL.
+    def __init__(self, urls=()):
+        self.data = bytearray()
+        self.ends = array('Q')
+        for url in urls:
+            self.append(url)
+
+    def append(self, url):
+        self.data += url.encode('utf-8')
+        self.ends.append(len(self.data))
+
+    def __getitem__(self, index):
+        index = range(len(self.ends))[index]
+        return self.data[self.ends[index - 1] if index else 0:self.ends[index]].decode('utf-8')
+
+    def __iter__(self):
+        start = 0
+        for end in self.ends:
+            yield self.data[start:end].decode('utf-8')
+            start = end
+
+    def __len__(self):
+        return len(self.ends)
+
+class BloomFilter:
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, url):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, url):
+        added = False
+        for position in self.positions(url):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, url):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(url))
+
+    def __len__(self):
+        return self.count
+
+def create_seen_set(mode='exact', capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+    if mode == 'bloom':
+        return BloomFilter(capacity=capacity, error_rate=error_rate)
+    if mode == 'exact':
+        return FingerprintSet()
+    raise ValueError(f"Unknown seen-set mode: {mode}")
+
+class CrawlFrontier:
+    def __init__(self, seen=None):
+        self.queue = deque()
+        self.seen = seen if seen is not None else FingerprintSet()
+
+    def push(self, url):
+        if not self.seen.add(url):
+            return False
+        self.queue.append(url)
+        return True
+
+    def restore(self, queued_urls, consumed):
+        for index, url in enumerate(queued_urls):
+            self.seen.add(url)
+            if index >= consumed:
+                self.queue.append(url)
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
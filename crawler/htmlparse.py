@@ -0,0 +1,284 @@
+import codecs
+import re
+
+from bs4 import BeautifulSoup, NavigableString
+from lxml import etree
+
+HTML_ENGINE = 'lxml'
+HEAD_FIELDS = frozenset(['title', 'description', 'lang'])
+ALL_FIELDS = HEAD_FIELDS | frozenset(['h1', 'h2', 'links', 'images', 'text'])
+CAPTURE_TAGS = frozenset(['title', 'h1', 'h2'])
+SKIPPED_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+NON_BODY_TEXT_TAGS = SKIPPED_TEXT_TAGS | frozenset(['head', 'title'])
+SNIFF_BYTES = 1024
+CONTROL_CHARACTERS = dict.fromkeys(code for code in range(32) if chr(code) not in '\t\n\r')
+
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.I)
+HTTP_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([A-Za-z0-9_.:-]+)', re.I)
+
+def known_encoding(name):
+    try:
+        return codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+
+def sniff_encoding(head, content_type=None):
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    match = META_CHARSET_PATTERN.search(head[:SNIFF_BYTES])
+    if match and known_encoding(match.group(1).decode('ascii')):
+        return known_encoding(match.group(1).decode('ascii'))
+    match = HTTP_CHARSET_PATTERN.search(content_type or '')
+    if match and known_encoding(match.group(1)):
+        return known_encoding(match.group(1))
+    return None
+
+def empty_result():
+    return {'title': 'N/A', 'description': 'N/A', 'lang': 'N/A', 'h1': [], 'h2': [], 'links': [], 'images': [], 'text': ''}
+
+class HtmlDecoder:
+    def __init__(self, head, content_type=None):
+        encoding = sniff_encoding(head, content_type)
+        self.fallback = encoding is None
+        self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')('strict' if encoding is None else 'replace')
+
+    def decode(self, data, final=False):
+        try:
+            text = self.decoder.decode(data, final)
+        except UnicodeDecodeError:
+            if not self.fallback:
+                raise
+            self.fallback = False
+            self.decoder = codecs.getincrementaldecoder('windows-1252')('replace')
+            text = self.decoder.decode(data, final)
+        # Control characters are invalid in HTML. libxml2 drops most of them and html.parser keeps them, so both engines get a copy without them.
+        return text.translate(CONTROL_CHARACTERS)
+
+def element_string(element):
+    children = list(element)
+    if not children:
+        return element.text or None
+    if len(children) == 1 and not element.text and not children[0].tail and isinstance(children[0].tag, str):
+        return element_string(children[0])
+    return None
+
+def collect_text(element, parts):
+    if element.text:
+        parts.append(element.text.strip())
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TEXT_TAGS:
+            collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail.strip())
+    return parts
+
+def element_text(element):
+    return ''.join(collect_text(element, []))
+
+class HtmlExtractor:
+    def __init__(self, fields=ALL_FIELDS, content_type=None):
+        self.fields = frozenset(fields)
+        self.content_type = content_type
+        self.parser = etree.HTMLPullParser(events=('start', 'end'))
+        self.decoder = None
+        self.head = b''
+        self.capture_depth = 0
+        self.skip_depth = 0
+        self.template_depth = 0
+        self.open_headings = []
+        self.in_body = False
+        self.text_parts = []
+        self.seen = set()
+        self.done = False
+        self.result = empty_result()
+
+    def feed(self, chunk):
+        if self.done:
+            return True
+        if self.decoder is None:
+            self.head += chunk
+            if len(self.head) < SNIFF_BYTES:
+                return False
+            chunk, self.head = self.head, b''
+            self.start_decoder(chunk)
+        self.feed_text(self.decode(chunk))
+        return self.done
+
+    def close(self):
+        if self.decoder is None:
+            self.start_decoder(self.head)
+            self.feed_text(self.decode(self.head))
+        if not self.done:
+            self.feed_text(self.decode(b'', final=True))
+            try:
+                self.parser.close()
+                self.process_events()
+            except (etree.XMLSyntaxError, etree.ParserError):
+                # An empty or unparseable body has no root element; the page keeps whatever was found so far.
+                pass
+        for tag in ('h1', 'h2'):
+            self.result[tag] = [text for text in self.result[tag] if text]
+        if 'text' in self.fields:
+            self.result['text'] = ' '.join(self.text_parts)
+        return self.result
+
+    def start_decoder(self, head):
+        self.decoder = HtmlDecoder(head, self.content_type)
+
+    def decode(self, data, final=False):
+        return self.decoder.decode(data, final)
+
+    def feed_text(self, text):
+        if text:
+            self.parser.feed(text)
+            self.process_events()
+
+    def process_events(self):
+        for event, element in self.parser.read_events():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            if event == 'start':
+                self.handle_start(tag, element)
+            else:
+                self.handle_end(tag, element)
+            if self.done:
+                return
+
+    def head_complete(self):
+        return self.fields <= HEAD_FIELDS and self.fields <= self.seen
+
+    def collect_text(self, text):
+        if text and self.in_body and self.skip_depth == 0:
+            self.text_parts.append(text)
+
+    def collect_preceding_text(self, parent, previous):
+        parts = []
+        while previous is not None and not isinstance(previous.tag, str):
+            parts.append(previous.tail)
+            previous = previous.getprevious()
+        parts.append(previous.tail if previous is not None else parent.text)
+        for text in reversed(parts):
+            self.collect_text(text)
+
+    def start_text(self, tag, element):
+        if element.getparent() is not None:
+            self.collect_preceding_text(element.getparent(), element.getprevious())
+        if tag == 'body':
+            self.in_body = True
+        if tag in NON_BODY_TEXT_TAGS:
+            self.skip_depth += 1
+
+    def end_text(self, tag, element):
+        self.collect_preceding_text(element, element[-1] if len(element) else None)
+        if tag in NON_BODY_TEXT_TAGS:
+            self.skip_depth -= 1
+
+    def handle_start(self, tag, element):
+        if 'text' in self.fields:
+            self.start_text(tag, element)
+        if tag in CAPTURE_TAGS:
+            self.capture_depth += 1
+        if tag == 'meta':
+            if 'description' not in self.seen and element.get('name') == 'description':
+                self.seen.add('description')
+                self.result['description'] = element.get('content', 'N/A')
+                self.done = self.head_complete()
+        elif tag == 'html':
+            if 'lang' not in self.seen:
+                self.seen.add('lang')
+                self.result['lang'] = element.get('lang', 'N/A')
+                self.done = self.head_complete()
+        elif tag == 'a':
+            href = element.get('href')
+            if href is not None and 'links' in self.fields:
+                self.result['links'].append(href)
+        elif tag == 'img':
+            if 'images' in self.fields:
+                self.result['images'].append((element.get('src'), element.get('alt')))
+        elif tag in ('h1', 'h2'):
+            # Headings are listed in document order, so a nested heading's slot is taken when it opens rather than when it closes.
+            if tag in self.fields:
+                self.open_headings.append(len(self.result[tag]))
+                self.result[tag].append(None)
+        elif tag == 'template':
+            self.template_depth += 1
+        elif tag == 'body' and self.fields <= HEAD_FIELDS:
+            self.done = True
+
+    def handle_end(self, tag, element):
+        if 'text' in self.fields:
+            self.end_text(tag, element)
+        if tag == 'title':
+            if 'title' not in self.seen:
+                self.seen.add('title')
+                self.result['title'] = element_string(element)
+                self.done = self.head_complete()
+        elif tag in ('h1', 'h2') and tag in self.fields:
+            # Template content is never rendered, so its headings do not count.
+            if self.template_depth == 0:
+                self.result[tag][self.open_headings[-1]] = element_text(element)
+            self.open_headings.pop()
+        elif tag == 'template':
+            self.template_depth -= 1
+        if tag in CAPTURE_TAGS:
+            self.capture_depth -= 1
+        if self.capture_depth == 0:
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+
+def soup_text(soup):
+    for string in (soup.body or soup).find_all(string=True):
+        if type(string) is NavigableString and not any(parent.name in NON_BODY_TEXT_TAGS for parent in string.parents):
+            yield string
+
+def extract_soup(soup, fields=ALL_FIELDS):
+    result = empty_result()
+    if soup.title:
+        result['title'] = soup.title.string
+    description_tag = soup.find('meta', attrs={'name': 'description'})
+    if description_tag and 'content' in description_tag.attrs:
+        result['description'] = description_tag['content']
+    html_tag = soup.find('html')
+    if html_tag:
+        result['lang'] = html_tag.get('lang', 'N/A')
+    for tag in ('h1', 'h2'):
+        if tag in fields:
+            result[tag] = [text for text in (element.get_text(strip=True) for element in soup.find_all(tag)) if text]
+    if 'links' in fields:
+        result['links'] = [link['href'] for link in soup.find_all('a', href=True)]
+    if 'images' in fields:
+        result['images'] = [(img.get('src'), img.get('alt', None)) for img in soup.find_all('img')]
+    if 'text' in fields:
+        result['text'] = ' '.join(soup_text(soup))
+    return result
+
+class SoupExtractor:
+    def __init__(self, fields=ALL_FIELDS, content_type=None):
+        self.fields = frozenset(fields)
+        self.content_type = content_type
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        return False
+
+    def close(self):
+        # Decoding up front, as HtmlExtractor does, keeps BeautifulSoup's own charset guessing out of the comparison.
+        content = b''.join(self.chunks)
+        text = HtmlDecoder(content[:SNIFF_BYTES], self.content_type).decode(content, final=True)
+        return extract_soup(BeautifulSoup(text, 'html.parser'), self.fields)
+
+def create_extractor(fields=ALL_FIELDS, content_type=None, engine=None):
+    if (engine or HTML_ENGINE) == 'html.parser':
+        return SoupExtractor(fields=fields, content_type=content_type)
+    return HtmlExtractor(fields=fields, content_type=content_type)
+
+def extract_html(content, fields=ALL_FIELDS, content_type=None, engine=None):
+    extractor = create_extractor(fields=fields, content_type=content_type, engine=engine)
+    extractor.feed(content)
+    return extractor.close()
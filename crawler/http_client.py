@@ -0,0 +1,404 @@
+import io
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+from .urls import normalize_url
+
+CRAWL_MAX_WORKERS = 16
+CRAWL_MAX_PER_HOST = 8
+
+USER_AGENT = "SEO-Web-Crawler/1.0"
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_POOL_HOSTS = 20
+
+HTML_CONTENT_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+MAX_BODY_BYTES = int(os.environ.get('CRAWLER_MAX_BODY_BYTES', 10 * 1024 * 1024))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+http_session = None
+http_session_lock = threading.Lock()
+
+class TimedConnectionMixin:
+    connect_timings = None
+    connected_at = 0.0
+    request_started = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        dns_host = self._dns_host
+        try:
+            addresses = {entry[4][0] for entry in socket.getaddrinfo(dns_host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)}
+        except (OSError, UnicodeError):
+            addresses = set()
+        resolved = time.perf_counter()
+        if len(addresses) == 1:
+            # Connecting to the address just resolved keeps DNS out of the connect time; hosts with several addresses keep urllib3's fallback order.
+            self._dns_host = addresses.pop()
+            try:
+                sock = super()._new_conn()
+            finally:
+                self._dns_host = dns_host
+        else:
+            sock = super()._new_conn()
+        self.connect_timings = {'dns': resolved - started, 'connect': time.perf_counter() - resolved, 'tls': 0.0}
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if self.connect_timings is not None:
+            self.connect_timings['tls'] = max(0.0, time.perf_counter() - started - self.connect_timings['dns'] - self.connect_timings['connect'])
+        self.connected_at = time.perf_counter()
+
+    def request(self, *args, **kwargs):
+        self.request_started = time.perf_counter()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self):
+        response = super().getresponse()
+        timings = self.connect_timings or {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        # Plain HTTP connects lazily inside request(), so time to first byte starts once the connection is up.
+        response.timings = dict(timings, ttfb=time.perf_counter() - max(self.request_started, self.connected_at))
+        # Later requests reuse the open connection, so they spend no time resolving or connecting.
+        self.connect_timings = None
+        return response
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+def create_http_adapter(pool_size=CRAWL_MAX_WORKERS, retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR):
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    return TimedHTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=pool_size, max_retries=retry)
+
+def mount_http_adapter(session, adapter):
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+def create_http_session(pool_size=CRAWL_MAX_WORKERS, retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR, user_agent=USER_AGENT):
+    session = requests.Session()
+    mount_http_adapter(session, create_http_adapter(pool_size, retries, backoff_factor))
+    session.headers['User-Agent'] = user_agent
+    return session
+
+http_pool_size = CRAWL_MAX_WORKERS
+http_connections_reserved = 0
+
+def get_http_session():
+    global http_session
+    with http_session_lock:
+        if http_session is None:
+            http_session = create_http_session(pool_size=http_pool_size)
+        return http_session
+
+def reserve_http_connections(count):
+    # Every worker pool that sends requests reserves its size, so the per-host pool never drops connections its threads just returned.
+    global http_pool_size, http_connections_reserved
+    with http_session_lock:
+        http_connections_reserved += count
+        if http_connections_reserved <= http_pool_size:
+            return
+        http_pool_size = http_connections_reserved
+        if http_session is not None:
+            previous = http_session.get_adapter('http://')
+            mount_http_adapter(http_session, create_http_adapter(http_pool_size))
+            previous.close()
+
+def release_http_connections(count):
+    global http_connections_reserved
+    with http_session_lock:
+        http_connections_reserved -= count
+
+@contextmanager
+def http_connections(count):
+    reserve_http_connections(count)
+    try:
+        yield
+    finally:
+        release_http_connections(count)
+
+RESPONSE_CACHE_PATH = os.environ.get('CRAWLER_RESPONSE_CACHE')
+RESPONSE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+RESPONSE_CACHE_MAX_AGE = 30 * 24 * 3600
+RESPONSE_CACHE_LOW_WATER = 0.9
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=RESPONSE_CACHE_MAX_BYTES, max_age=RESPONSE_CACHE_MAX_AGE):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'url TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, etag TEXT, '
+                'last_modified TEXT, size INTEGER, stored_at REAL, accessed_at REAL)'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+            self.total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self.evict()
+
+    def lookup(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status, headers, body, etag, last_modified, accessed_at FROM responses WHERE url = ?', (key,)
+            ).fetchone()
+        if row is None or row[5] < time.time() - self.max_age:
+            return None
+        return {'status': row[0], 'headers': json.loads(row[1]), 'body': row[2], 'etag': row[3], 'last_modified': row[4]}
+
+    def store(self, key, response, body=None):
+        if body is None:
+            body = response.content
+        now = time.time()
+        with self.lock, self.connection:
+            previous = self.connection.execute('SELECT size FROM responses WHERE url = ?', (key,)).fetchone()
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, response.status_code, json.dumps(dict(response.headers)), body, response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), len(body), now, now)
+            )
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def touch(self, key):
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), key))
+
+    def evict(self):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM responses WHERE accessed_at < ?', (time.time() - self.max_age,))
+            total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total_bytes > self.max_bytes:
+                # Trimming to a low-water mark in one statement leaves room for many stores before the next eviction scan.
+                excess = total_bytes - int(self.max_bytes * RESPONSE_CACHE_LOW_WATER)
+                self.connection.execute(
+                    'DELETE FROM responses WHERE url IN (SELECT url FROM ('
+                    'SELECT url, SUM(size) OVER (ORDER BY accessed_at, url ROWS UNBOUNDED PRECEDING) - size AS freed FROM responses'
+                    ') WHERE freed < ?)', (excess,)
+                )
+                total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            self.total_bytes = total_bytes
+
+    def fetch(self, session, url, **kwargs):
+        key = normalize_url(url)
+        entry = self.lookup(key)
+        conditional_headers = {}
+        if entry is not None:
+            if entry['etag']:
+                conditional_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                conditional_headers['If-Modified-Since'] = entry['last_modified']
+        response = session.get(url, headers=conditional_headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.touch(key)
+            with self.lock:
+                self.hits += 1
+            return self.build_response(url, entry)
+        with self.lock:
+            self.misses += 1
+        validated = 'ETag' in response.headers or 'Last-Modified' in response.headers
+        if response.status_code == 200 and not response.history and validated:
+            if kwargs.get('stream'):
+                response.cache_key = key
+            else:
+                self.store(key, response)
+        return response
+
+    def build_response(self, url, entry):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers.pop('Content-Encoding', None)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        response._content_consumed = True
+        return response
+
+    def stats(self):
+        with self.lock:
+            hits, misses, total_bytes = self.hits, self.misses, self.total_bytes
+        lookups = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0, 'bytes': total_bytes}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+response_cache = None
+
+def enable_response_cache(path, max_bytes=RESPONSE_CACHE_MAX_BYTES, max_age=RESPONSE_CACHE_MAX_AGE):
+    global response_cache
+    response_cache = ResponseCache(path, max_bytes=max_bytes, max_age=max_age)
+    return response_cache
+
+def disable_response_cache():
+    global response_cache
+    if response_cache is not None:
+        response_cache.close()
+        response_cache = None
+
+if RESPONSE_CACHE_PATH:
+    enable_response_cache(RESPONSE_CACHE_PATH)
+
+request_scheduler = None
+
+def set_request_scheduler(scheduler):
+    global request_scheduler
+    previous, request_scheduler = request_scheduler, scheduler
+    return previous
+
+request_metrics = None
+
+def set_request_metrics(metrics):
+    global request_metrics
+    previous, request_metrics = request_metrics, metrics
+    return previous
+
+def observe_cache(cache, hit):
+    metrics = request_metrics
+    if metrics is not None:
+        metrics.observe_cache(cache, hit)
+
+def measured(send):
+    metrics = request_metrics
+    if metrics is None:
+        return send()
+    try:
+        response = send()
+    except requests.exceptions.RequestException:
+        metrics.observe_error()
+        raise
+    timings = getattr(response.raw, 'timings', None) or {}
+    retries = getattr(getattr(response.raw, 'retries', None), 'history', ())
+    metrics.observe_request(timings, len(retries), response.status_code)
+    return response
+
+def scheduled(url, send):
+    scheduler = request_scheduler
+    if scheduler is None:
+        return measured(send)
+    scheduler.acquire(url)
+    response = measured(send)
+    scheduler.observe(url, response)
+    return response
+
+def http_get(url, **kwargs):
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    if response_cache is None or 'headers' in kwargs:
+        return scheduled(url, lambda: get_http_session().get(url, **kwargs))
+    return scheduled(url, lambda: response_cache.fetch(get_http_session(), url, **kwargs))
+
+def http_head(url, **kwargs):
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    return scheduled(url, lambda: get_http_session().head(url, **kwargs))
+
+def set_max_body_bytes(max_bytes):
+    global MAX_BODY_BYTES
+    MAX_BODY_BYTES = max_bytes
+
+class UnsupportedContentType(requests.exceptions.RequestException):
+    pass
+
+def response_content_type(response):
+    return response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+
+def is_html_response(response):
+    content_type = response_content_type(response)
+    return not content_type or content_type in HTML_CONTENT_TYPES
+
+class BodyStream:
+    def __init__(self, response, max_bytes=None, chunk_size=STREAM_CHUNK_SIZE):
+        self.response = response
+        self.max_bytes = MAX_BODY_BYTES if max_bytes is None else max_bytes
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.truncated = False
+        self.started = time.perf_counter()
+        cache_key = getattr(response, 'cache_key', None)
+        self.cache_chunks = [] if cache_key is not None and response_cache is not None else None
+
+    def __iter__(self):
+        for chunk in self.response.iter_content(self.chunk_size):
+            remaining = self.max_bytes - self.size
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+                self.truncated = True
+            self.size += len(chunk)
+            if self.cache_chunks is not None and not self.truncated:
+                self.cache_chunks.append(chunk)
+            if chunk:
+                yield chunk
+            if self.truncated:
+                return
+        if self.cache_chunks is not None and response_cache is not None:
+            response_cache.store(self.response.cache_key, self.response, b''.join(self.cache_chunks))
+            self.cache_chunks = None
+
+    def close(self):
+        self.response.close()
+        if request_metrics is not None:
+            request_metrics.observe_download(time.perf_counter() - self.started, self.size)
+
+class ResponseStream(io.RawIOBase):
+    def __init__(self, response, chunk_size=64 * 1024):
+        self.chunks = response.iter_content(chunk_size)
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b''
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
@@ -0,0 +1,239 @@
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+from .checkpoint import checkpoint_path_for
+from .metrics import CrawlMetrics, profiled
+from .process import iter_process_url, load_crawl_results, save_crawl_results
+from .progress import CrawlProgress
+from .results import ResultStore
+from .urls import normalize_url
+
+JOBS_DIR = os.environ.get('CRAWLER_JOBS_DIR', '.crawl_jobs')
+JOB_WORKERS = int(os.environ.get('CRAWLER_JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = 0.5
+JOB_PROGRESS_INTERVAL = 1.0
+JOB_STOP_TIMEOUT = 10.0
+RESULT_CACHE_TTL = 24 * 3600
+
+def job_cache_key(input_url, input_type, options=None, previous_results=None):
+    key = {
+        'input_url': normalize_url(input_url.strip()),
+        'input_type': input_type,
+        'options': options or {},
+        'previous_results': hashlib.sha256(json.dumps(previous_results, sort_keys=True).encode('utf-8')).hexdigest() if previous_results else None,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+class JobStore:
+    def __init__(self, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(jobs_dir, 'jobs.sqlite'), timeout=30, check_same_thread=False, isolation_level=None)
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, cache_key TEXT, input_url TEXT, input_type TEXT, options TEXT, status TEXT, '
+                'progress TEXT, error TEXT, cancel_requested INTEGER DEFAULT 0, worker_pid INTEGER, '
+                'created_at REAL, started_at REAL, finished_at REAL)'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_cache_key ON jobs (cache_key, finished_at)')
+
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def execute(self, sql, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def get(self, job_id):
+        with self.lock:
+            cursor = self.connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description]
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job['options'] = json.loads(job['options'])
+        job['progress'] = json.loads(job['progress']) if job['progress'] else None
+        return job
+
+    def find_reusable(self, cache_key, max_age=RESULT_CACHE_TTL):
+        rows = self.execute(
+            "SELECT id FROM jobs WHERE cache_key = ? AND (status IN ('queued', 'running') OR (status = 'complete' AND finished_at >= ?)) "
+            "ORDER BY status = 'complete' DESC, created_at DESC LIMIT 1",
+            (cache_key, time.time() - max_age)
+        )
+        return rows[0][0] if rows else None
+
+    def submit(self, input_url, input_type="Website URL", options=None, previous_results=None, use_cache=True):
+        options = options or {}
+        cache_key = job_cache_key(input_url, input_type, options, previous_results)
+        if use_cache:
+            job_id = self.find_reusable(cache_key)
+            if job_id is not None:
+                return job_id
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        if previous_results is not None:
+            with open(os.path.join(self.job_dir(job_id), 'previous.json'), 'w', encoding='utf-8') as f:
+                json.dump(previous_results, f)
+        self.execute(
+            "INSERT INTO jobs (id, cache_key, input_url, input_type, options, status, created_at) VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+            (job_id, cache_key, input_url, input_type, json.dumps(options), time.time())
+        )
+        return job_id
+
+    def claim(self, worker_pid):
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.connection.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?", (worker_pid, time.time(), row[0])
+                    )
+                self.connection.execute('COMMIT')
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+        return row[0] if row is not None else None
+
+    def update_progress(self, job_id, progress):
+        self.execute('UPDATE jobs SET progress = ? WHERE id = ?', (json.dumps(progress), job_id))
+        rows = self.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,))
+        return bool(rows and rows[0][0])
+
+    def finish(self, job_id, status, progress=None, error=None):
+        self.execute(
+            'UPDATE jobs SET status = ?, progress = COALESCE(?, progress), error = ?, finished_at = ? WHERE id = ?',
+            (status, json.dumps(progress) if progress is not None else None, error, time.time(), job_id)
+        )
+
+    def cancel(self, job_id):
+        self.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+        self.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,))
+
+    def requeue_orphans(self, live_pids=()):
+        placeholders = ','.join('?' * len(live_pids))
+        condition = f" AND worker_pid NOT IN ({placeholders})" if live_pids else ''
+        self.execute(f"UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE status = 'running'{condition}", tuple(live_pids))
+
+    def load_results(self, job_id):
+        job_dir = self.job_dir(job_id)
+        data = load_crawl_results(os.path.join(job_dir, 'crawl.json'))
+        data['results'] = ResultStore.open(os.path.join(job_dir, 'results'))
+        return data
+
+    def purge(self, max_age=RESULT_CACHE_TTL):
+        rows = self.execute(
+            "SELECT id FROM jobs WHERE status IN ('complete', 'cancelled', 'failed') AND finished_at < ?", (time.time() - max_age,)
+        )
+        for (job_id,) in rows:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            self.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def run_job(store, job_id, politeness=True):
+    job = store.get(job_id)
+    job_dir = store.job_dir(job_id)
+    previous_path = os.path.join(job_dir, 'previous.json')
+    previous_results = load_crawl_results(previous_path) if os.path.exists(previous_path) else None
+    options = dict(job['options'])
+    options.setdefault('politeness', politeness)
+    checkpoint_dir = options.pop('checkpoint_dir', None)
+    metrics = CrawlMetrics() if options.pop('metrics', False) else None
+    profile = profiled(os.path.join(job_dir, 'profile.prof')) if options.pop('profile', False) else nullcontext()
+    checkpoint_path = checkpoint_path_for(job['input_url'], job['input_type'], checkpoint_dir) if checkpoint_dir else None
+    progress = CrawlProgress()
+    cancel_event = threading.Event()
+    last_update = 0.0
+    with profile:
+        for event in iter_process_url(job['input_url'], job['input_type'], previous_results=previous_results, checkpoint_path=checkpoint_path,
+                                      results_path=os.path.join(job_dir, 'results'), cancel_event=cancel_event, metrics=metrics, **options):
+            progress.update(event)
+            if event['type'] == 'complete':
+                data = event['data']
+                if 'error' in data:
+                    store.finish(job_id, 'failed', progress.snapshot(), data['error'])
+                    return
+                save_crawl_results(data, os.path.join(job_dir, 'crawl.json'))
+                store.finish(job_id, 'cancelled' if event['cancelled'] else 'complete', progress.snapshot())
+                return
+            if time.monotonic() - last_update >= JOB_PROGRESS_INTERVAL:
+                last_update = time.monotonic()
+                if store.update_progress(job_id, progress.snapshot()):
+                    cancel_event.set()
+
+def worker_loop(jobs_dir, stop_event=None, poll_interval=JOB_POLL_INTERVAL, politeness=True):
+    store = JobStore(jobs_dir)
+    try:
+        while stop_event is None or not stop_event.is_set():
+            job_id = store.claim(os.getpid())
+            if job_id is None:
+                time.sleep(poll_interval)
+                continue
+            try:
+                run_job(store, job_id, politeness)
+            except Exception as e:
+                store.finish(job_id, 'failed', error=str(e))
+    finally:
+        store.close()
+
+class JobRunner:
+    def __init__(self, jobs_dir=JOBS_DIR, workers=JOB_WORKERS, politeness=True):
+        self.jobs_dir = jobs_dir
+        self.store = JobStore(jobs_dir)
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.workers = [
+            # Not daemonic, so a job can start the page pipeline's parse processes.
+            self.context.Process(target=worker_loop, args=(jobs_dir, self.stop_event, JOB_POLL_INTERVAL, politeness), name=f"crawl-worker-{index}")
+            for index in range(workers)
+        ]
+
+    def start(self):
+        # Jobs left running by a previous server process are resumed from their checkpoints.
+        self.store.requeue_orphans()
+        self.store.purge()
+        for worker in self.workers:
+            worker.start()
+        atexit.register(self.stop, JOB_STOP_TIMEOUT)
+        return self
+
+    def submit(self, input_url, input_type="Website URL", options=None, previous_results=None, use_cache=True):
+        return self.store.submit(input_url, input_type, options, previous_results, use_cache)
+
+    def status(self, job_id):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        self.store.cancel(job_id)
+
+    def results(self, job_id):
+        return self.store.load_results(job_id)
+
+    def stop(self, timeout=None):
+        atexit.unregister(self.stop)
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout)
+            # A job still running is requeued from its checkpoint when the runner starts again.
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self.store.close()
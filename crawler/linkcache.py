@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+LINK_STATUS_CACHE_SIZE = 100_000
+LINK_STATUS_TTL = float(os.environ.get('CRAWLER_LINK_STATUS_TTL', 3600))
+LINK_STATUS_CACHE_PATH = os.environ.get('CRAWLER_LINK_STATUS_CACHE')
+
+class LinkStatusCache:
+    def __init__(self, max_entries=LINK_STATUS_CACHE_SIZE, ttl=LINK_STATUS_TTL, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        if path is not None:
+            self.persist_to(path)
+
+    def persist_to(self, path):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS link_status (url TEXT PRIMARY KEY, status TEXT, checked_at REAL)')
+            connection.execute('DELETE FROM link_status WHERE checked_at < ?', (time.time() - self.ttl,))
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = connection
+
+    def lookup(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None and self.connection is not None:
+            row = self.connection.execute('SELECT status, checked_at FROM link_status WHERE url = ?', (key,)).fetchone()
+            if row is not None:
+                entry = self.remember(key, row)
+        if entry is None:
+            return None
+        if entry[1] < now - self.ttl:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def get(self, key, default=None):
+        with self.lock:
+            status = self.lookup(key, time.time())
+            if status is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return status
+
+    def write(self, key, status, now):
+        self.remember(key, (status, now))
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO link_status VALUES (?, ?, ?)', (key, status, now))
+
+    def set(self, key, status):
+        with self.lock:
+            self.write(key, status, time.time())
+
+    def setdefault(self, key, status):
+        now = time.time()
+        with self.lock:
+            current = self.lookup(key, now)
+            if current is None:
+                self.write(key, status, now)
+            return status if current is None else current
+
+    def __contains__(self, key):
+        with self.lock:
+            return self.lookup(key, time.time()) is not None
+
+    def __getitem__(self, key):
+        status = self.get(key)
+        if status is None:
+            raise KeyError(key)
+        return status
+
+    def __setitem__(self, key, status):
+        self.set(key, status)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute('DELETE FROM link_status')
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expirations': self.expirations, 'evictions': self.evictions,
+            }
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+link_status_cache = LinkStatusCache(path=LINK_STATUS_CACHE_PATH)
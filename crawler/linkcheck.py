@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import requests
+
+from .http_client import http_connections, http_get, http_head, observe_cache
+from .linkcache import link_status_cache
+from .results import NON_HTML_STATUS
+from .urls import normalize_url
+
+LINK_CHECK_WORKERS = 16
+LINK_CHECK_TIMEOUT = 10
+MAX_REDIRECT_HOPS = 10
+CHECKED_SCHEMES = frozenset(['http', 'https'])
+REDIRECT_STATUSES = frozenset(['301', '302', '303', '307', '308'])
+KNOWN_PAGE_STATUSES = {'200_ok': '200', NON_HTML_STATUS: '200', '404': '404'}
+CACHED_HOP_STATUSES = {'200': '200_ok', '404': '404'}
+
+def link_targets(page_url, hrefs):
+    targets = []
+    seen = set()
+    for href in hrefs:
+        link = urldefrag(urljoin(page_url, href.strip()))[0]
+        if urlparse(link).scheme in CHECKED_SCHEMES and link not in seen:
+            seen.add(link)
+            targets.append(link)
+    return targets
+
+def is_broken_status(status):
+    return not status.startswith('2')
+
+def request_hop(url):
+    try:
+        response = http_head(url, allow_redirects=False, timeout=LINK_CHECK_TIMEOUT)
+        response.close()
+        if response.status_code < 400:
+            return str(response.status_code), response.headers.get('Location')
+    except requests.exceptions.RequestException:
+        pass
+    # Plenty of servers reject or mishandle HEAD, so a failed HEAD is confirmed with a GET before reporting it.
+    try:
+        response = http_get(url, allow_redirects=False, timeout=LINK_CHECK_TIMEOUT, stream=True)
+        response.close()
+    except requests.exceptions.RequestException:
+        return 'broken', None
+    return str(response.status_code), response.headers.get('Location')
+
+class LinkChecker:
+    def __init__(self, max_workers=LINK_CHECK_WORKERS, max_hops=MAX_REDIRECT_HOPS, status_cache=link_status_cache):
+        self.max_workers = max_workers
+        self.max_hops = max_hops
+        self.status_cache = status_cache
+        self.hops = {}
+        self.lock = threading.Lock()
+
+    def seed(self, url, status):
+        future = Future()
+        future.set_result((status, None))
+        with self.lock:
+            self.hops.setdefault(url, future)
+
+    def hop(self, url):
+        with self.lock:
+            future = self.hops.get(url)
+            owner = future is None
+            if owner:
+                future = self.hops[url] = Future()
+        observe_cache('link_check', not owner)
+        if owner:
+            try:
+                future.set_result(self.cached_hop(url) or self.request_hop(url))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def cached_hop(self, url):
+        # Only final statuses are shared with the page crawl; redirects are re-requested because the chain needs their targets.
+        if self.status_cache is None:
+            return None
+        status = KNOWN_PAGE_STATUSES.get(self.status_cache.get(normalize_url(url)))
+        return (status, None) if status is not None else None
+
+    def request_hop(self, url):
+        status, location = request_hop(url)
+        if self.status_cache is not None and status in CACHED_HOP_STATUSES:
+            self.status_cache[normalize_url(url)] = CACHED_HOP_STATUSES[status]
+        return status, location
+
+    def resolve(self, url):
+        chain = [url]
+        while True:
+            status, location = self.hop(chain[-1])
+            if status not in REDIRECT_STATUSES or not location:
+                return status, chain
+            next_url = urldefrag(urljoin(chain[-1], location.strip()))[0]
+            if next_url in chain:
+                return 'redirect_loop', chain + [next_url]
+            if len(chain) > self.max_hops:
+                return 'too_many_redirects', chain
+            chain.append(next_url)
+
+    def check(self, links):
+        links = list(links)
+        with http_connections(self.max_workers), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(links, executor.map(self.resolve, links)))
+
+    def requested(self):
+        with self.lock:
+            return len(self.hops)
+
+def check_page_links(pages, checker=None):
+    checker = checker or LinkChecker()
+    known_statuses = {page_url: KNOWN_PAGE_STATUSES.get(page['status']) for page_url, page in pages.items()}
+    links = {link for page in pages.values() for link in page.get('links', ())}
+    for link in links:
+        status = known_statuses.get(normalize_url(link))
+        if status is not None:
+            checker.seed(link, status)
+    statuses = checker.check(sorted(links))
+    broken_links = []
+    for page_url, page in pages.items():
+        for link in page.get('links', ()):
+            status, chain = statuses[link]
+            if is_broken_status(status):
+                broken_links.append((page_url, link, status, ' -> '.join(chain) if len(chain) > 1 else ''))
+    return broken_links
@@ -0,0 +1,226 @@
+import cProfile
+import json
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+REQUEST_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download')
+TIMING_QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_PREFIX = 'crawler'
+METRICS_COLUMNS = ['Section', 'Metric', 'Value']
+
+def quantile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def cache_counters():
+    from .extract import link_status_cache
+    from .http_client import response_cache
+    counters = {'link_status': link_status_cache.stats()}
+    if response_cache is not None:
+        counters['response'] = response_cache.stats()
+    return counters
+
+class CrawlMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.timings = {phase: array('d') for phase in REQUEST_PHASES}
+        self.stages = defaultdict(lambda: [0, 0.0])
+        self.counters = Counter()
+        self.statuses = Counter()
+        self.queue_depth = {'current': 0, 'max': 0}
+        self.cache_baseline = cache_counters()
+        self.cache_lookups = defaultdict(lambda: [0, 0])
+
+    def observe_request(self, timings, retries, status):
+        with self.lock:
+            for phase, seconds in timings.items():
+                self.timings[phase].append(seconds)
+            self.counters['requests'] += 1
+            self.counters['retries'] += retries
+            self.statuses[str(status)] += 1
+
+    def observe_download(self, seconds, size):
+        with self.lock:
+            self.timings['download'].append(seconds)
+            self.counters['bytes'] += size
+
+    def observe_error(self):
+        with self.lock:
+            self.counters['requests'] += 1
+            self.counters['errors'] += 1
+
+    def observe_cache(self, cache, hit):
+        with self.lock:
+            self.cache_lookups[cache][0 if hit else 1] += 1
+
+    def add_stage_time(self, name, seconds):
+        with self.lock:
+            self.stages[name][0] += 1
+            self.stages[name][1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - started)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def set_queue_depth(self, depth):
+        with self.lock:
+            self.queue_depth['current'] = depth
+            self.queue_depth['max'] = max(self.queue_depth['max'], depth)
+
+    def update(self, event):
+        if event['type'] == 'crawl':
+            self.count('crawled')
+            self.set_queue_depth(event['queued'])
+        elif event['type'] == 'page':
+            self.count('pages')
+            self.set_queue_depth(event['total'] - event['processed'])
+
+    def cache_stats(self):
+        stats = {}
+        for cache, counters in cache_counters().items():
+            baseline = self.cache_baseline.get(cache, {})
+            hits = counters['hits'] - baseline.get('hits', 0)
+            misses = counters['misses'] - baseline.get('misses', 0)
+            stats[cache] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+        # Caches that live only for one crawl, such as the link checker's and image probe's, report their lookups as they happen.
+        with self.lock:
+            lookups = {cache: tuple(counts) for cache, counts in self.cache_lookups.items()}
+        for cache, (hits, misses) in lookups.items():
+            stats[cache] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+        return stats
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            timings = {
+                phase: dict({'count': len(values), 'seconds': sum(values), 'max': max(values, default=0.0)},
+                            **{f'p{round(q * 100)}': quantile(values, q) for q in TIMING_QUANTILES})
+                for phase, values in self.timings.items()
+            }
+            snapshot = {
+                'elapsed': elapsed,
+                'pages': self.counters['pages'],
+                'pages_per_second': self.counters['pages'] / elapsed if elapsed else 0.0,
+                'crawled': self.counters['crawled'],
+                'fetch_errors': self.counters['fetch_errors'],
+                'parse_errors': self.counters['parse_errors'],
+                'requests': self.counters['requests'],
+                'errors': self.counters['errors'],
+                'retries': self.counters['retries'],
+                'bytes': self.counters['bytes'],
+                'statuses': dict(self.statuses),
+                'queue_depth': dict(self.queue_depth),
+                'request_timings': timings,
+                'stages': {name: {'count': count, 'seconds': seconds} for name, (count, seconds) in self.stages.items()},
+            }
+        snapshot['caches'] = self.cache_stats()
+        return snapshot
+
+def stage_timer(metrics, name):
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+def observed(events, metrics):
+    if metrics is None:
+        return (yield from events)
+    try:
+        while True:
+            try:
+                event = next(events)
+            except StopIteration as stop:
+                return stop.value
+            metrics.update(event)
+            yield event
+    finally:
+        events.close()
+
+@contextmanager
+def profiled(path):
+    # cProfile only sees the thread that enables it; fetch threads and parse processes show up as time spent waiting on them.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+def metrics_rows(snapshot):
+    rows = [
+        ('Crawl', 'Elapsed (s)', round(snapshot['elapsed'], 3)),
+        ('Crawl', 'Pages analyzed', snapshot['pages']),
+        ('Crawl', 'Pages per second', round(snapshot['pages_per_second'], 3)),
+        ('Crawl', 'URLs crawled', snapshot['crawled']),
+        ('Crawl', 'Fetch errors', snapshot['fetch_errors']),
+        ('Crawl', 'Parse errors', snapshot['parse_errors']),
+        ('Crawl', 'Max queue depth', snapshot['queue_depth']['max']),
+        ('Requests', 'Requests', snapshot['requests']),
+        ('Requests', 'Errors', snapshot['errors']),
+        ('Requests', 'Retries', snapshot['retries']),
+        ('Requests', 'Bytes downloaded', snapshot['bytes']),
+    ]
+    for status, count in sorted(snapshot['statuses'].items()):
+        rows.append(('Requests', f'HTTP {status}', count))
+    for phase, timing in snapshot['request_timings'].items():
+        for statistic in ('count', 'p50', 'p95', 'p99', 'max'):
+            value = timing[statistic] if statistic == 'count' else round(timing[statistic] * 1000, 2)
+            rows.append(('Request Timings', f"{phase.upper() if phase in ('dns', 'tls') else phase.capitalize()} {statistic}{'' if statistic == 'count' else ' (ms)'}", value))
+    for name, stage in snapshot['stages'].items():
+        rows.append(('Stages', f'{name} (s)', round(stage['seconds'], 3)))
+        rows.append(('Stages', f'{name} calls', stage['count']))
+    for cache, stats in snapshot['caches'].items():
+        rows.append(('Caches', f'{cache} hit rate', round(stats['hit_rate'], 4)))
+        rows.append(('Caches', f'{cache} hits', stats['hits']))
+        rows.append(('Caches', f'{cache} misses', stats['misses']))
+    return rows
+
+def prometheus_text(snapshot, prefix=PROMETHEUS_PREFIX):
+    lines = []
+
+    def metric(name, kind, samples, help_text):
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f'{prefix}_{name}{{{label_text}}} {value}' if label_text else f'{prefix}_{name} {value}')
+
+    metric('elapsed_seconds', 'gauge', [({}, snapshot['elapsed'])], "Wall-clock duration of the crawl.")
+    metric('pages_total', 'counter', [({}, snapshot['pages'])], "Pages analyzed.")
+    metric('pages_per_second', 'gauge', [({}, snapshot['pages_per_second'])], "Pages analyzed per second.")
+    metric('page_errors_total', 'counter', [({'stage': 'fetch'}, snapshot['fetch_errors']), ({'stage': 'parse'}, snapshot['parse_errors'])],
+           "Pages that could not be fetched or parsed and were recorded as error rows.")
+    metric('requests_total', 'counter', [({}, snapshot['requests'])], "HTTP requests sent.")
+    metric('request_errors_total', 'counter', [({}, snapshot['errors'])], "HTTP requests that failed without a response.")
+    metric('request_retries_total', 'counter', [({}, snapshot['retries'])], "HTTP retries.")
+    metric('response_bytes_total', 'counter', [({}, snapshot['bytes'])], "Response body bytes read.")
+    metric('responses_total', 'counter', [({'status': status}, count) for status, count in sorted(snapshot['statuses'].items())], "HTTP responses by status code.")
+    metric('queue_depth', 'gauge', [({'value': key}, depth) for key, depth in snapshot['queue_depth'].items()], "URLs waiting to be crawled or analyzed.")
+    samples = []
+    for phase, timing in snapshot['request_timings'].items():
+        samples.extend(({'phase': phase, 'quantile': str(q)}, timing[f'p{round(q * 100)}']) for q in TIMING_QUANTILES)
+    metric('request_phase_seconds', 'summary', samples, "Per-request DNS, connect, TLS, time-to-first-byte and download durations.")
+    lines.extend(f'{prefix}_request_phase_seconds_sum{{phase="{phase}"}} {timing["seconds"]}' for phase, timing in snapshot['request_timings'].items())
+    lines.extend(f'{prefix}_request_phase_seconds_count{{phase="{phase}"}} {timing["count"]}' for phase, timing in snapshot['request_timings'].items())
+    metric('stage_seconds_total', 'counter', [({'stage': name}, stage['seconds']) for name, stage in snapshot['stages'].items()], "Time spent in each crawl stage.")
+    metric('cache_hit_ratio', 'gauge', [({'cache': cache}, stats['hit_rate']) for cache, stats in snapshot['caches'].items()], "Cache hit rate.")
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(snapshot, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.prom') or path.endswith('.txt'):
+            f.write(prometheus_text(snapshot))
+        else:
+            json.dump(snapshot, f, indent=2)
@@ -0,0 +1,120 @@
+import hashlib
+import re
+
+import numpy as np
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MASK = (1 << 32) - 1
+CONTENT_SIGNATURE_PREFIX = 'm61:'
+CONTENT_SHINGLE_WORDS = 3
+METADATA_SHINGLE_CHARS = 4
+NEAR_DUPLICATE_MIN_SIMILARITY = 0.8
+NEAR_DUPLICATE_BUCKET_WINDOW = 64
+
+WORD_PATTERN = re.compile(r'\w+')
+permutation_seeds = np.random.default_rng(20240101).integers(1, MINHASH_PRIME, size=(2, MINHASH_PERMUTATIONS), dtype=np.uint64)
+
+def normalize_tokens(text):
+    return WORD_PATTERN.findall(str(text).lower())
+
+def word_shingles(tokens, size=CONTENT_SHINGLE_WORDS):
+    if len(tokens) <= size:
+        return [' '.join(tokens)] if tokens else []
+    return [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+def char_shingles(tokens, size=METADATA_SHINGLE_CHARS):
+    text = ' '.join(tokens)
+    if len(text) <= size:
+        return [text] if text else []
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+def shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+
+def mersenne_reduce(values):
+    # 2**61 is 1 modulo the prime, so the bits above 61 fold back onto the low ones.
+    values = (values & np.uint64(MINHASH_PRIME)) + (values >> np.uint64(61))
+    return np.where(values >= np.uint64(MINHASH_PRIME), values - np.uint64(MINHASH_PRIME), values)
+
+def permuted_hashes(hashes):
+    # (a * x + b) mod 2**61 - 1 without overflowing uint64: a is split into 29 high and 32 low bits, x is a 32-bit shingle hash.
+    multipliers, offsets = permutation_seeds
+    high = hashes[:, None] * (multipliers >> np.uint64(32))
+    low = mersenne_reduce(hashes[:, None] * (multipliers & np.uint64(MINHASH_MASK)))
+    shifted_high = (high >> np.uint64(29)) + ((high & np.uint64((1 << 29) - 1)) << np.uint64(32))
+    return mersenne_reduce(low + shifted_high + offsets)
+
+def minhash(shingles):
+    if not shingles:
+        return None
+    unique_shingles = set(shingles)
+    hashes = np.fromiter((shingle_hash(shingle) for shingle in unique_shingles), dtype=np.uint64, count=len(unique_shingles))
+    return (permuted_hashes(hashes) & np.uint64(MINHASH_MASK)).min(axis=0).astype(np.uint32)
+
+def content_signature(text):
+    signature = minhash(word_shingles(normalize_tokens(text)))
+    return None if signature is None else CONTENT_SIGNATURE_PREFIX + signature.tobytes().hex()
+
+def metadata_signature(text):
+    return minhash(char_shingles(normalize_tokens(text)))
+
+def current_signature(encoded):
+    # Signatures saved before the hash family changed are not comparable with new ones.
+    return isinstance(encoded, str) and encoded.startswith(CONTENT_SIGNATURE_PREFIX)
+
+def decode_signatures(encoded):
+    hex_digits = ''.join(signature[len(CONTENT_SIGNATURE_PREFIX):] for signature in encoded)
+    return np.frombuffer(bytes.fromhex(hex_digits), dtype=np.uint32).reshape(len(encoded), MINHASH_PERMUTATIONS)
+
+def estimated_similarity(signatures, first, second):
+    return float(np.mean(signatures[first] == signatures[second]))
+
+def candidate_pairs(signatures, bands=MINHASH_BANDS, window=NEAR_DUPLICATE_BUCKET_WINDOW):
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        columns = signatures[:, band * rows:(band + 1) * rows]
+        order = np.lexsort(columns.T[::-1])
+        ordered = columns[order]
+        starts = np.flatnonzero(np.r_[True, (ordered[1:] != ordered[:-1]).any(axis=1)])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = np.sort(order[start:end]).tolist()
+            for offset, first in enumerate(members):
+                for second in members[offset + 1:offset + 1 + window]:
+                    yield first, second
+
+class DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+def near_duplicate_groups(signatures, min_similarity=NEAR_DUPLICATE_MIN_SIMILARITY):
+    # Besides its group, each signature gets a matching candidate and their pairwise similarity, so the report never compares against an unrelated member.
+    groups = DisjointSet(len(signatures))
+    matches = np.full(len(signatures), -1, dtype=np.int64)
+    similarities = np.zeros(len(signatures))
+    for first, second in candidate_pairs(signatures):
+        if matches[first] >= 0 and matches[second] >= 0 and groups.find(first) == groups.find(second):
+            continue
+        similarity = estimated_similarity(signatures, first, second)
+        if similarity < min_similarity:
+            continue
+        groups.union(first, second)
+        for item, other in ((first, second), (second, first)):
+            if similarity > similarities[item]:
+                matches[item], similarities[item] = other, similarity
+    return [groups.find(index) for index in range(len(signatures))], matches, similarities
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .extract import empty_page, fetch_page, parse_page
+from .http_client import CRAWL_MAX_WORKERS, release_http_connections, reserve_http_connections
+from .metrics import stage_timer
+from .results import PARSE_ERROR_STATUS
+
+PARSE_WORKERS = int(os.environ.get('CRAWLER_PARSE_WORKERS', (os.cpu_count() or 1) - 1))
+PIPELINE_DEPTH = 4
+
+def completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def run_inline(function, *args):
+    # Parsing on the fetch thread reports its errors through a future, like the parse pool does.
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def timed_parse_page(page_url, body, content_type=None):
+    started = time.perf_counter()
+    fields = parse_page(page_url, body, content_type)
+    return fields, time.perf_counter() - started
+
+def can_start_processes():
+    # Daemonic processes may not have children of their own, so they parse on the fetch threads.
+    return not multiprocessing.current_process().daemon
+
+class PagePipeline:
+    def __init__(self, fetch_workers=CRAWL_MAX_WORKERS, parse_workers=PARSE_WORKERS, max_pending=None, image_probe=None, metrics=None):
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers if can_start_processes() else 0
+        self.max_pending = max_pending or PIPELINE_DEPTH * max(fetch_workers, self.parse_workers)
+        self.image_probe = image_probe
+        self.metrics = metrics
+        reserve_http_connections(fetch_workers)
+        self.fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers)
+        self.parse_executor = None
+        if self.parse_workers > 0:
+            self.parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def fetch(self, page_url, previous_page):
+        with stage_timer(self.metrics, 'fetch'):
+            page, body = fetch_page(page_url, previous_page)
+        if body is None:
+            return page, None
+        if self.parse_executor is None:
+            return page, run_inline(timed_parse_page, page_url, *body)
+        return page, self.parse_executor.submit(timed_parse_page, page_url, *body)
+
+    def finish(self, page_url, stage):
+        try:
+            page, parsed = stage.result()
+        except Exception:
+            # fetch_page already turns request failures into error rows; anything else it raises is recorded the same way.
+            self.count_error('fetch_errors')
+            return empty_page()
+        if parsed is not None:
+            try:
+                fields, seconds = parsed.result()
+            except Exception:
+                # Only a fetched 200 page has a body to parse. Without its content hash the next incremental crawl parses it again.
+                self.count_error('parse_errors')
+                page.pop('content_hash', None)
+                return dict(page, status=PARSE_ERROR_STATUS)
+            page.update(fields)
+            if self.metrics is not None:
+                self.metrics.add_stage_time('parse', seconds)
+            if self.image_probe is not None:
+                self.image_probe.submit(page['image_urls'])
+        return page
+
+    def count_error(self, name):
+        if self.metrics is not None:
+            self.metrics.count(name)
+
+    def analyze(self, jobs):
+        # Each job is (page_url, previous_page, page); a page that is already known skips both stages but keeps its place in the output order.
+        in_flight = deque()
+        for page_url, previous_page, page in jobs:
+            if page is not None:
+                stage = completed((page, None))
+            else:
+                stage = self.fetch_executor.submit(self.fetch, page_url, previous_page)
+            in_flight.append((page_url, stage))
+            # Bounding the pages in flight bounds the response bodies held in memory and holds back fetching while parsing catches up.
+            while len(in_flight) >= self.max_pending:
+                next_url, next_stage = in_flight.popleft()
+                yield next_url, self.finish(next_url, next_stage)
+        while in_flight:
+            next_url, next_stage = in_flight.popleft()
+            yield next_url, self.finish(next_url, next_stage)
+
+    def close(self):
+        self.fetch_executor.shutdown(wait=True, cancel_futures=True)
+        release_http_connections(self.fetch_workers)
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
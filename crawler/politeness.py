@@ -0,0 +1,134 @@
+import email.utils
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from . import http_client
+from .robots import robots_cache
+
+POLITENESS_ENABLED = os.environ.get('CRAWLER_POLITENESS', '1') != '0'
+HOST_RATE_LIMIT = float(os.environ.get('CRAWLER_HOST_RATE', 10.0))
+HOST_BURST = 8
+HOST_MIN_RATE = 0.1
+HOST_BACKOFF_FACTOR = 0.5
+HOST_RECOVERY_STEP = 0.05
+HOST_MAX_PAUSE = 300.0
+THROTTLE_STATUSES = frozenset([429, 503])
+
+def retry_after_seconds(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def response_statuses(response):
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    statuses = [entry.status for entry in getattr(retries, 'history', ()) if entry.status is not None]
+    statuses.append(response.status_code)
+    return statuses
+
+class TokenBucket:
+    def __init__(self, rate, burst=HOST_BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def reserve(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+    def throttle(self, now, pause=None):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate, 0.0)
+        self.updated = now
+        self.rate = max(HOST_MIN_RATE, self.rate * HOST_BACKOFF_FACTOR)
+        self.paused_until = max(self.paused_until, now + min(HOST_MAX_PAUSE, pause if pause is not None else 1.0 / self.rate))
+
+    def recover(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate * HOST_RECOVERY_STEP)
+
+class PolitenessScheduler:
+    def __init__(self, rate=HOST_RATE_LIMIT, burst=HOST_BURST, respect_robots=True, robots=None):
+        self.rate = rate
+        self.burst = burst
+        self.respect_robots = respect_robots
+        self.robots = robots if robots is not None else robots_cache
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allowed(self, url):
+        return not self.respect_robots or self.robots.can_fetch(url)
+
+    def host_limits(self, url):
+        crawl_delay = self.robots.crawl_delay(url) if self.respect_robots else None
+        if crawl_delay:
+            return min(self.rate, 1.0 / crawl_delay) if self.rate > 0 else 1.0 / crawl_delay, 1
+        return self.rate, self.burst
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host in self.buckets:
+                return self.buckets[host]
+        rate, burst = self.host_limits(url)
+        with self.lock:
+            return self.buckets.setdefault(host, TokenBucket(rate, burst) if rate > 0 else None)
+
+    def acquire(self, url):
+        bucket = self.bucket(url)
+        if bucket is None:
+            return
+        with self.lock:
+            wait = bucket.reserve(time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def observe(self, url, response):
+        bucket = self.bucket(url)
+        if bucket is None:
+            return
+        throttled = any(status in THROTTLE_STATUSES for status in response_statuses(response))
+        with self.lock:
+            if throttled:
+                bucket.throttle(time.monotonic(), retry_after_seconds(response.headers.get('Retry-After')))
+            elif response.status_code < 400:
+                bucket.recover()
+
+def enable_politeness(rate=HOST_RATE_LIMIT, burst=HOST_BURST, respect_robots=True):
+    if rate <= 0 and not respect_robots:
+        return disable_politeness()
+    scheduler = PolitenessScheduler(rate=rate, burst=burst, respect_robots=respect_robots)
+    http_client.set_request_scheduler(scheduler)
+    return scheduler
+
+def disable_politeness():
+    http_client.set_request_scheduler(None)
+
+def use_politeness(politeness=True):
+    # True keeps a scheduler the caller already installed and otherwise applies the configured defaults;
+    # a dict holds enable_politeness settings and False turns politeness off. Returns the scheduler to restore afterwards.
+    previous = http_client.request_scheduler
+    if politeness is True:
+        if previous is None and POLITENESS_ENABLED:
+            enable_politeness()
+    elif politeness:
+        enable_politeness(**politeness)
+    else:
+        disable_politeness()
+    return previous
+
+def url_allowed(url):
+    scheduler = http_client.request_scheduler
+    return scheduler is None or scheduler.allowed(url)
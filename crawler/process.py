@@ -0,0 +1,200 @@
+import json
+
+from .checkpoint import CrawlCheckpoint
+from .crawl import iter_crawl_website
+from .extract import ImageSizeProbe
+from .frontier import FingerprintSet
+from .http_client import set_request_metrics, set_request_scheduler
+from .linkcheck import check_page_links
+from .metrics import observed, stage_timer
+from .pipeline import PARSE_WORKERS, PagePipeline
+from .politeness import url_allowed, use_politeness
+from .results import PAGE_ERROR_STATUSES, ResultStore
+from .sitemap import fetch_sitemap
+from .urls import is_tag_page, is_valid_url, normalize_url
+
+def page_diff_values(page):
+    return {
+        'Status': page.get('status'),
+        'Meta Title': page['meta'][0],
+        'Meta Description': page['meta'][1],
+        'H1': ' | '.join(page['headers'].get('H1', [])),
+        'Images Missing Alt': len(page.get('images_missing_alt', [])),
+        'Images Over 100KB': len(page.get('images_over_100kb', []))
+    }
+
+def diff_crawl_pages(previous_pages, current_pages):
+    changes = []
+    for page_url, page in current_pages.items():
+        if page_url not in previous_pages:
+            changes.append({'Page URL': page_url, 'Change': 'New', 'Field': '', 'Previous': '', 'Current': page.get('status')})
+            continue
+        previous_values = page_diff_values(previous_pages[page_url])
+        for field, value in page_diff_values(page).items():
+            if previous_values[field] != value:
+                changes.append({'Page URL': page_url, 'Change': 'Changed', 'Field': field, 'Previous': previous_values[field], 'Current': value})
+    for page_url, page in previous_pages.items():
+        if page_url not in current_pages:
+            changes.append({'Page URL': page_url, 'Change': 'Removed', 'Field': '', 'Previous': page.get('status'), 'Current': ''})
+    return changes
+
+def serializable_results(data):
+    return {key: value for key, value in data.items() if key != 'results'}
+
+def save_crawl_results(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(serializable_results(data), f)
+
+def load_crawl_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def resume_crawl(checkpoint_path):
+    records = CrawlCheckpoint(checkpoint_path).load()
+    if not records or 'start' not in records[0]:
+        raise ValueError(f"No crawl to resume in {checkpoint_path}")
+    start = records[0]['start']
+    return process_url(start['input_url'], start['input_type'], checkpoint_path=checkpoint_path)
+
+def normalize_meta_value(value):
+    if not value or value.strip() == '' or value.strip() == 'N/A':
+        return 'N/A'
+    return value
+
+def append_page_rows(results, page_url, page):
+    page_status = page['status']
+    title, description, lang = page['meta']
+    results.append('pages', page_url, page_status, normalize_meta_value(title), normalize_meta_value(description), lang)
+    if page_status in PAGE_ERROR_STATUSES:
+        return
+    headers = page['headers']
+    for h in headers.get('H1', ["Missing"]):
+        results.append('headers_h1', page_url, h)
+    for h in headers.get('H2', ["Missing"]):
+        results.append('headers_h2', page_url, h)
+    for image in page['images_missing_alt']:
+        results.append('images_missing_alt', *image)
+    if page.get('content_signature'):
+        results.append('content_fingerprints', page_url, page['content_signature'])
+
+def cancelled(cancel_event):
+    return cancel_event is not None and cancel_event.is_set()
+
+def page_jobs(page_urls, checkpointed_pages, previous_pages, lastmods, cancel_event=None):
+    queued_urls = FingerprintSet()
+    for page_url in page_urls:
+        if cancelled(cancel_event):
+            return
+        if not queued_urls.add(page_url):
+            continue
+        previous_page = previous_pages.get(page_url)
+        lastmod = lastmods.get(page_url)
+        if page_url in checkpointed_pages:
+            yield page_url, previous_page, checkpointed_pages[page_url]
+        elif previous_page is not None and lastmod and previous_page.get('lastmod') == lastmod:
+            yield page_url, previous_page, previous_page
+        else:
+            yield page_url, previous_page, None
+
+def iter_process_url(input_url, input_type="Website URL", previous_results=None, checkpoint_path=None, crawl_options=None,
+                     results_path=None, results_format=None, check_links=True, parse_workers=PARSE_WORKERS, cancel_event=None, metrics=None,
+                     politeness=True):
+    results = ResultStore(results_path, results_format)
+    processed = 0
+    image_probe = ImageSizeProbe()
+    pipeline = PagePipeline(parse_workers=parse_workers, image_probe=image_probe, metrics=metrics)
+    previous_metrics = set_request_metrics(metrics) if metrics is not None else None
+    previous_scheduler = use_politeness(politeness)
+    pages = {}
+    lastmods = {}
+    previous_pages = (previous_results or {}).get('pages', {})
+    checkpoint = CrawlCheckpoint(checkpoint_path) if checkpoint_path else None
+    records = checkpoint.load() if checkpoint else []
+    discovery = next((record for record in records if 'urls' in record), None)
+    checkpointed_pages = {record['page']: record['data'] for record in records if 'page' in record}
+    if checkpoint is not None and not records:
+        checkpoint.append({'start': {'input_url': input_url, 'input_type': input_type}})
+    error = None
+    try:
+        if discovery is not None:
+            combined_urls, tag_pages, lastmods = discovery['urls'], discovery['tags'], discovery['lastmods']
+        else:
+            if input_type == "Sitemap URL":
+                with stage_timer(metrics, 'sitemap'):
+                    page_urls, tag_pages, lastmods = fetch_sitemap(input_url)
+            else:
+                with stage_timer(metrics, 'crawl'):
+                    page_urls = yield from observed(iter_crawl_website(input_url, checkpoint=checkpoint, records=records, cancel_event=cancel_event,
+                                                                       **(crawl_options or {})), metrics)
+                tag_pages = [url for url in page_urls if is_tag_page(url)]
+            page_urls = [normalize_url(url) for url in page_urls if is_valid_url(url) and url_allowed(url)]
+            tag_pages = [normalize_url(url) for url in tag_pages if is_valid_url(url) and url_allowed(url)]
+            combined_urls = list(set(page_urls + tag_pages))
+            if checkpoint is not None and not cancelled(cancel_event):
+                checkpoint.append({'urls': combined_urls, 'tags': tag_pages, 'lastmods': lastmods})
+                checkpoint.flush()
+        if cancelled(cancel_event):
+            combined_urls, tag_pages = [], []
+        yield {'type': 'discovered', 'total': len(combined_urls), 'tags': len(tag_pages)}
+        for tag_page in tag_pages:
+            results.append('tag_pages', tag_page)
+        for page_url, page in pipeline.analyze(page_jobs(combined_urls, checkpointed_pages, previous_pages, lastmods, cancel_event)):
+            if cancelled(cancel_event):
+                break
+            if page_url not in checkpointed_pages:
+                page['lastmod'] = lastmods.get(page_url)
+            pages[page_url] = page
+            if checkpoint is not None and page_url not in checkpointed_pages:
+                checkpoint.append({'page': page_url, 'data': page})
+            processed += 1
+            append_page_rows(results, page_url, page)
+            event = {'type': 'page', 'url': page_url, 'page': page, 'processed': processed, 'total': len(combined_urls)}
+            if metrics is not None:
+                metrics.update(event)
+            yield event
+        yield {'type': 'stage', 'stage': 'images'}
+        with stage_timer(metrics, 'images'):
+            for page_url, page in pages.items():
+                if 'images_over_100kb' not in page:
+                    page['images_over_100kb'] = image_probe.oversized(page_url, page['image_urls'])
+                for image in page['images_over_100kb']:
+                    results.append('images_over_100kb', *image)
+        if check_links and not cancelled(cancel_event):
+            yield {'type': 'stage', 'stage': 'links'}
+            with stage_timer(metrics, 'link_check'):
+                for broken_link in check_page_links(pages):
+                    results.append('broken_links', *broken_link)
+    except Exception as e:
+        error = str(e)
+    finally:
+        pipeline.close()
+        image_probe.close()
+        results.close()
+        if metrics is not None:
+            set_request_metrics(previous_metrics)
+        set_request_scheduler(previous_scheduler)
+        if checkpoint is not None:
+            checkpoint.flush()
+    if error is not None:
+        yield {'type': 'complete', 'cancelled': False, 'data': {"error": error}}
+        return
+    # A cancelled crawl keeps its checkpoint so the next run resumes where it stopped.
+    if checkpoint is not None and not cancelled(cancel_event):
+        checkpoint.complete()
+    data = {
+        "input_url": input_url,
+        "results": results,
+        "pages": pages,
+        "diff": diff_crawl_pages(previous_pages, pages) if previous_results else None
+    }
+    if metrics is not None:
+        data["metrics"] = metrics.snapshot()
+    yield {'type': 'complete', 'cancelled': cancelled(cancel_event), 'data': data}
+
+def process_url(input_url, input_type="Website URL", previous_results=None, checkpoint_path=None, crawl_options=None,
+                results_path=None, results_format=None, check_links=True, parse_workers=PARSE_WORKERS, metrics=None, politeness=True):
+    for event in iter_process_url(input_url, input_type=input_type, previous_results=previous_results, checkpoint_path=checkpoint_path,
+                                  crawl_options=crawl_options, results_path=results_path, results_format=results_format, check_links=check_links,
+                                  parse_workers=parse_workers, metrics=metrics, politeness=politeness):
+        if event['type'] == 'complete':
+            return event['data']
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import deque
+
+from .results import NON_HTML_STATUS, PAGE_ERROR_STATUSES
+
+RECENT_PAGE_ROWS = 200
+PAGE_ROW_COLUMNS = ['Page URL', 'Status', 'Meta Title', 'Meta Description', 'H1 Count', 'Images Missing Alt']
+
+def page_issues(page):
+    if page['status'] in PAGE_ERROR_STATUSES:
+        return {'Error Pages': int(page['status'] != NON_HTML_STATUS)}
+    title, description, _ = page['meta']
+    return {
+        'Missing Meta Titles': int(not title or title == 'N/A'),
+        'Missing Meta Descriptions': int(not description or description == 'N/A'),
+        'Missing H1': int(page['headers'].get('H1') == ["Missing"]),
+        'Images Missing Alt Text': len(page['images_missing_alt']),
+    }
+
+class CrawlProgress:
+    def __init__(self, recent_rows=RECENT_PAGE_ROWS):
+        self.started = time.monotonic()
+        self.stage = 'discovering'
+        self.fetched = 0
+        self.queued = 0
+        self.total = None
+        self.processed = 0
+        self.issues = dict.fromkeys(['Error Pages', 'Missing Meta Titles', 'Missing Meta Descriptions', 'Missing H1', 'Images Missing Alt Text'], 0)
+        self.recent = deque(maxlen=recent_rows)
+        self.lock = threading.Lock()
+
+    def update(self, event):
+        with self.lock:
+            if event['type'] == 'crawl':
+                self.fetched, self.queued = event['fetched'], event['queued']
+            elif event['type'] == 'discovered':
+                self.stage, self.total, self.queued = 'analyzing', event['total'], event['total']
+            elif event['type'] == 'page':
+                page = event['page']
+                self.processed = event['processed']
+                self.queued = event['total'] - event['processed']
+                for issue, count in page_issues(page).items():
+                    self.issues[issue] += count
+                title, description, _ = page['meta']
+                self.recent.append((event['url'], page['status'], title, description, len([h for h in page['headers'].get('H1', []) if h != "Missing"]), len(page['images_missing_alt'])))
+            elif event['type'] == 'stage':
+                self.stage = event['stage']
+            elif event['type'] == 'complete':
+                self.stage = 'cancelled' if event['cancelled'] else 'complete'
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            done = self.processed if self.total is not None else self.fetched
+            return {
+                'stage': self.stage, 'fetched': self.fetched, 'queued': self.queued, 'total': self.total,
+                'processed': self.processed, 'elapsed': elapsed, 'pages_per_second': done / elapsed if elapsed else 0.0,
+                'issues': dict(self.issues), 'recent': list(self.recent),
+            }
@@ -0,0 +1,126 @@
+import zipfile
+from io import BytesIO, TextIOWrapper
+
+import pandas as pd
+import xlsxwriter
+
+from .analysis import build_sections, duplicate_status, multiple_status
+from .metrics import METRICS_COLUMNS, metrics_rows
+
+def add_multiple_status_based_on_url(df, section_name):
+    df[f'{section_name} Multiple'] = multiple_status(df)
+    return df
+
+def check_duplicates(headers, text_column):
+    headers_df = pd.DataFrame(headers).copy()
+    headers_df['Duplicate Status'] = duplicate_status(headers_df, text_column)
+    return headers_df
+
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_SHEET_NAME_LENGTH = 31
+CSV_CHUNK_ROWS = 50_000
+
+def sheet_frame(data):
+    return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+def split_sheet_name(sheet_name, part):
+    if part == 0:
+        return sheet_name[:EXCEL_SHEET_NAME_LENGTH]
+    suffix = f" ({part + 1})"
+    return sheet_name[:EXCEL_SHEET_NAME_LENGTH - len(suffix)] + suffix
+
+def write_excel(data_dict, target, max_rows=EXCEL_MAX_ROWS):
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'strings_to_urls': False})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    rows_per_sheet = max_rows - 1
+    for sheet_name, data in data_dict.items():
+        df = sheet_frame(data)
+        for part, start in enumerate(range(0, len(df), rows_per_sheet)):
+            worksheet = workbook.add_worksheet(split_sheet_name(sheet_name, part))
+            worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+            rows = df.iloc[start:start + rows_per_sheet].itertuples(index=False, name=None)
+            for row, values in enumerate(rows, start=1):
+                for col, value in enumerate(values):
+                    if isinstance(value, str):
+                        worksheet.write_string(row, col, value)
+                    elif value is not None and value == value:
+                        worksheet.write(row, col, value)
+    workbook.close()
+
+def convert_df_to_excel(data_dict):
+    output = BytesIO()
+    write_excel(data_dict, output)
+    return output.getvalue()
+
+def write_csv_zip(data_dict, target):
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for sheet_name, data in data_dict.items():
+            df = sheet_frame(data)
+            if len(df) > 0:
+                with archive.open(f"{sheet_name}.csv", 'w') as f, TextIOWrapper(f, encoding='utf-8', newline='') as text:
+                    df.to_csv(text, index=False, chunksize=CSV_CHUNK_ROWS)
+
+def convert_df_to_csv_zip(data_dict):
+    output = BytesIO()
+    write_csv_zip(data_dict, output)
+    return output.getvalue()
+
+def build_export_sheets(data, sections=None):
+    if sections is None:
+        sections = build_sections(data)
+    data_dict = {}
+
+    if len(sections["meta_titles_all"]):
+        data_dict["Meta Titles - All"] = sections["meta_titles_all"]
+
+    if len(sections["meta_titles_below_30"]):
+        data_dict["Meta Titles Below 30"] = sections["meta_titles_below_30"]
+
+    if len(sections["meta_titles_missing"]):
+        data_dict["Meta Titles Missing"] = sections["meta_titles_missing"]
+
+    if len(sections["meta_titles_duplicate"]):
+        data_dict["Meta Titles Duplicate"] = sections["meta_titles_duplicate"]
+
+    if len(sections["meta_descriptions_all"]):
+        data_dict["Meta Descriptions-All"] = sections["meta_descriptions_all"]
+
+    if len(sections["meta_descriptions_below_50"]):
+        data_dict["Meta Descriptions Below 50"] = sections["meta_descriptions_below_50"]
+
+    if len(sections["meta_descriptions_missing"]):
+        data_dict["Meta Descriptions Missing"] = sections["meta_descriptions_missing"]
+
+    if len(sections["meta_descriptions_duplicate"]):
+        data_dict["Meta Descriptions Duplicate"] = sections["meta_descriptions_duplicate"]
+
+    if len(sections["headers_h1"]):
+        data_dict["H1 Headers"] = sections["headers_h1"]
+
+    if len(sections["headers_h2"]):
+        data_dict["H2 Headers"] = sections["headers_h2"]
+
+    if len(sections["tag_pages"]):
+        data_dict["Tag Pages"] = sections["tag_pages"]
+
+    if len(sections["page_status"]):
+        data_dict["Page status"] = sections["page_status"]
+
+    if len(sections["images_missing_alt"]):
+        data_dict["Images Missing Alt Text"] = sections["images_missing_alt"]
+
+    if len(sections["images_over_100kb"]):
+        data_dict["Images Over 100KB"] = sections["images_over_100kb"]
+
+    if len(sections["near_duplicates"]):
+        data_dict["Near-Duplicate Content"] = sections["near_duplicates"]
+
+    if len(sections["broken_links"]):
+        data_dict["Broken Links"] = sections["broken_links"]
+
+    if data.get("diff"):
+        data_dict["Changes"] = data["diff"]
+
+    if data.get("metrics"):
+        data_dict["Crawl Performance"] = pd.DataFrame(metrics_rows(data["metrics"]), columns=METRICS_COLUMNS)
+    return data_dict
@@ -0,0 +1,177 @@
+import csv
+import importlib.util
+import os
+from array import array
+
+RESULT_CHUNK_ROWS = 50_000
+RESULT_TABLES = {
+    'pages': ['Page URL', 'Status', 'Meta Title', 'Meta Description', 'Language'],
+    'headers_h1': ['Page URL', 'H1 Text'],
+    'headers_h2': ['Page URL', 'H2 Text'],
+    'images_missing_alt': ['Page URL', 'Image URL'],
+    'images_over_100kb': ['Page URL', 'Image URL', 'Image Size (bytes)'],
+    'tag_pages': ['Page URL'],
+    'content_fingerprints': ['Page URL', 'Content Signature'],
+    'broken_links': ['Page URL', 'Link URL', 'Status', 'Redirect Chain'],
+}
+URL_COLUMNS = frozenset(['Page URL', 'Image URL', 'Link URL'])
+CATEGORY_COLUMNS = frozenset(['Status'])
+INTEGER_COLUMNS = frozenset(['Image Size (bytes)'])
+NON_HTML_STATUS = 'skipped_non_html'
+PARSE_ERROR_STATUS = 'parse_error'
+# Pages without an HTML document to analyze are listed with their status but left out of the meta data and heading reports.
+PAGE_ERROR_STATUSES = frozenset(['404', 'broken', 'redirect_301', 'redirect_302', NON_HTML_STATUS, PARSE_ERROR_STATUS])
+
+def parquet_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+def default_result_format():
+    return 'parquet' if parquet_available() else 'csv'
+
+class UrlDictionary:
+    def __init__(self):
+        self.urls = []
+        self.codes = {}
+        self.index = None
+
+    def code(self, url):
+        if url is None:
+            return -1
+        code = self.codes.get(url)
+        if code is None:
+            code = self.codes[url] = len(self.urls)
+            self.urls.append(url)
+        return code
+
+    def decode(self, codes):
+        return [self.urls[code] if code >= 0 else None for code in codes]
+
+    def categories(self):
+        import pandas as pd
+        if self.index is None or len(self.index) != len(self.urls):
+            self.index = pd.Index(self.urls, dtype=object)
+        return self.index
+
+class ResultTable:
+    def __init__(self, name, columns, urls, path=None, file_format='csv', chunk_rows=RESULT_CHUNK_ROWS):
+        self.name = name
+        self.columns = columns
+        self.urls = urls
+        self.path = path
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+        self.buffers = [self.new_buffer(column) for column in columns]
+        self.rows = 0
+        self.writer = None
+        self.closed = False
+
+    def new_buffer(self, column):
+        return array('l') if column in URL_COLUMNS else []
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, *values):
+        for column, buffer, value in zip(self.columns, self.buffers, values):
+            buffer.append(self.urls.code(value) if column in URL_COLUMNS else value)
+        self.rows += 1
+        if self.path is not None and len(self.buffers[0]) >= self.chunk_rows:
+            self.flush()
+
+    def decoded_columns(self):
+        return [self.urls.decode(buffer) if column in URL_COLUMNS else buffer for column, buffer in zip(self.columns, self.buffers)]
+
+    def flush(self):
+        if self.path is None or (self.writer is not None and not self.buffers[0]):
+            return
+        if self.file_format == 'parquet':
+            self.write_parquet()
+        else:
+            self.write_csv()
+        self.buffers = [self.new_buffer(column) for column in self.columns]
+
+    def write_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema([(column, pa.int64() if column in INTEGER_COLUMNS else pa.string()) for column in self.columns])
+        table = pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(self.decoded_columns(), schema)], schema=schema)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, schema)
+        self.writer.write_table(table)
+
+    def write_csv(self):
+        if self.writer is None:
+            self.writer = open(self.path, 'w', newline='', encoding='utf-8')
+            csv.writer(self.writer).writerow(self.columns)
+        csv.writer(self.writer).writerows(zip(*self.decoded_columns()))
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        self.closed = True
+
+    def to_frame(self):
+        import pandas as pd
+        if self.path is None:
+            frame = pd.DataFrame({
+                column: pd.Categorical.from_codes(buffer, categories=self.urls.categories()) if column in URL_COLUMNS else buffer
+                for column, buffer in zip(self.columns, self.buffers)
+            }, columns=self.columns)
+        else:
+            self.close()
+            if self.file_format == 'parquet':
+                frame = pd.read_parquet(self.path)
+            else:
+                frame = pd.read_csv(
+                    self.path, keep_default_na=False, na_values={column: [''] for column in URL_COLUMNS.intersection(self.columns)},
+                    dtype={column: str for column in self.columns if column not in INTEGER_COLUMNS}
+                )
+            for column in URL_COLUMNS.intersection(self.columns):
+                frame[column] = frame[column].astype('category')
+        for column in CATEGORY_COLUMNS.intersection(self.columns):
+            frame[column] = frame[column].astype('category')
+        return frame
+
+class ResultStore:
+    def __init__(self, path=None, file_format=None, chunk_rows=RESULT_CHUNK_ROWS):
+        self.path = path
+        self.file_format = file_format or default_result_format()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self.urls = UrlDictionary()
+        self.cache = {}
+        extension = 'parquet' if self.file_format == 'parquet' else 'csv'
+        self.tables = {
+            name: ResultTable(
+                name, columns, self.urls,
+                path=os.path.join(path, f"{name}.{extension}") if path is not None else None,
+                file_format=self.file_format, chunk_rows=chunk_rows
+            )
+            for name, columns in RESULT_TABLES.items()
+        }
+
+    @classmethod
+    def open(cls, path):
+        file_format = 'parquet' if os.path.exists(os.path.join(path, 'pages.parquet')) else 'csv'
+        store = cls(path, file_format)
+        for table in store.tables.values():
+            if not os.path.exists(table.path):
+                table.path = None
+            table.closed = True
+        return store
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def append(self, name, *values):
+        self.tables[name].append(*values)
+
+    def frame(self, name):
+        return self.tables[name].to_frame()
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
@@ -0,0 +1,103 @@
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from .http_client import HTTP_TIMEOUT, USER_AGENT, get_http_session
+
+ROBOTS_CACHE_TTL = 24 * 3600
+ROBOTS_FAILURE_TTL = 5 * 60
+
+def robots_url_for(url):
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+
+def parse_crawl_delays(lines):
+    delays = {}
+    agents = []
+    in_rules = False
+    for line in lines:
+        field, _, value = line.split('#', 1)[0].partition(':')
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif field:
+            in_rules = True
+            if field == 'crawl-delay':
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays.setdefault(agent, delay)
+    return delays
+
+def matching_crawl_delay(delays, user_agent):
+    name = user_agent.split('/')[0].lower()
+    for agent, delay in delays.items():
+        if agent != '*' and agent in name:
+            return delay
+    return delays.get('*')
+
+def fetch_robots(robots_url):
+    robot_parser = RobotFileParser()
+    robot_parser.set_url(robots_url)
+    robot_parser.crawl_delays = {}
+    robot_parser.failed = False
+    robot_parser.modified()
+    try:
+        # Fetched on the bare session so the request scheduler, which needs these rules, is not re-entered.
+        response = get_http_session().get(robots_url, timeout=HTTP_TIMEOUT)
+    except requests.exceptions.RequestException:
+        response = None
+    if response is None or response.status_code >= 500:
+        # An unreachable robots.txt may still forbid crawling, so nothing is fetched until a retry succeeds.
+        robot_parser.disallow_all = robot_parser.failed = True
+    elif response.status_code in (401, 403):
+        robot_parser.disallow_all = True
+    elif 400 <= response.status_code < 500:
+        robot_parser.allow_all = True
+    else:
+        lines = response.text.splitlines()
+        robot_parser.parse(lines)
+        # RobotFileParser only understands whole-second delays, so fractional ones are read here.
+        robot_parser.crawl_delays = parse_crawl_delays(lines)
+    return robot_parser
+
+class RobotsCache:
+    def __init__(self, user_agent=USER_AGENT, ttl=ROBOTS_CACHE_TTL, failure_ttl=ROBOTS_FAILURE_TTL):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.parsers = {}
+        self.host_locks = {}
+        self.lock = threading.Lock()
+
+    def parser(self, url):
+        robots_url = robots_url_for(url)
+        with self.lock:
+            host_lock = self.host_locks.setdefault(robots_url, threading.Lock())
+        with host_lock:
+            robot_parser = self.parsers.get(robots_url)
+            if robot_parser is None or robot_parser.mtime() < time.time() - (self.failure_ttl if robot_parser.failed else self.ttl):
+                robot_parser = self.parsers[robots_url] = fetch_robots(robots_url)
+        return robot_parser
+
+    def can_fetch(self, url, user_agent=None):
+        return self.parser(url).can_fetch(user_agent or self.user_agent, url)
+
+    def crawl_delay(self, url, user_agent=None):
+        return matching_crawl_delay(self.parser(url).crawl_delays, user_agent or self.user_agent)
+
+    def clear(self):
+        with self.lock:
+            self.parsers.clear()
+
+robots_cache = RobotsCache()
+
+def is_crawl_allowed(url, user_agent=None):
+    return robots_cache.can_fetch(url, user_agent)
@@ -0,0 +1,97 @@
+import gzip
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from lxml import etree
+
+from .http_client import ResponseStream, http_connections, http_get
+from .urls import is_tag_page, normalize_url
+
+SITEMAP_MAX_WORKERS = 8
+SITEMAP_EXCLUDE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.css', '.js', '.pdf', '.zip']
+
+def open_sitemap_stream(sitemap_url):
+    response = http_get(sitemap_url, stream=True)
+    response.raise_for_status()
+    stream = io.BufferedReader(ResponseStream(response))
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+def read_sitemap_document(sitemap_url):
+    nested_sitemaps = []
+    page_entries = []
+    with open_sitemap_stream(sitemap_url) as stream:
+        for _, element in etree.iterparse(stream, events=('end',), tag=('{*}sitemap', '{*}url'), recover=True, huge_tree=True, resolve_entities=False):
+            loc = (element.findtext('{*}loc') or '').strip()
+            if loc:
+                if etree.QName(element).localname == 'sitemap':
+                    nested_sitemaps.append(loc)
+                else:
+                    lastmod = (element.findtext('{*}lastmod') or '').strip() or None
+                    page_entries.append((loc, lastmod))
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    return nested_sitemaps, page_entries
+
+def iter_sitemap_entries(sitemap_url, max_workers=SITEMAP_MAX_WORKERS):
+    seen_sitemaps = {normalize_url(sitemap_url)}
+    with http_connections(max_workers), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque([(sitemap_url, executor.submit(read_sitemap_document, sitemap_url))])
+        while pending:
+            current_sitemap, future = pending.popleft()
+            try:
+                nested_sitemaps, page_entries = future.result()
+            except (requests.exceptions.RequestException, OSError, etree.LxmlError) as e:
+                print(f"Error fetching sitemap {current_sitemap}: {e}")
+                continue
+            for nested_sitemap in nested_sitemaps:
+                key = normalize_url(nested_sitemap)
+                if key not in seen_sitemaps and not any(nested_sitemap.endswith(ext) for ext in SITEMAP_EXCLUDE_EXTENSIONS):
+                    seen_sitemaps.add(key)
+                    pending.append((nested_sitemap, executor.submit(read_sitemap_document, nested_sitemap)))
+            yield from page_entries
+
+def iter_sitemap_urls(sitemap_url, max_workers=SITEMAP_MAX_WORKERS):
+    for url, _ in iter_sitemap_entries(sitemap_url, max_workers=max_workers):
+        yield url
+
+def fetch_sitemap(sitemap_url):
+    page_urls = []
+    tag_pages = []
+    lastmods = {}
+    for url, lastmod in iter_sitemap_entries(sitemap_url):
+        page_urls.append(url)
+        if lastmod:
+            lastmods[normalize_url(url)] = lastmod
+        if is_tag_page(url):
+            tag_pages.append(url)
+    if not tag_pages:
+        print("No tag pages found in this sitemap.")
+    return page_urls, tag_pages, lastmods
+
+def fetch_sitemap_urls(sitemap_url):
+    try:
+        nested_sitemaps, page_entries = read_sitemap_document(sitemap_url)
+        sitemap_urls = nested_sitemaps or [url for url, _ in page_entries]
+        return [url for url in sitemap_urls if not any(url.endswith(ext) for ext in SITEMAP_EXCLUDE_EXTENSIONS)]
+    except (requests.exceptions.RequestException, OSError, etree.LxmlError) as e:
+        print(f"Error fetching sitemap URLs: {e}")
+        return []
+    
+def fetch_page_urls(sitemap_url):
+    try:
+        nested_sitemaps, page_entries = read_sitemap_document(sitemap_url)
+        return nested_sitemaps + [url for url, _ in page_entries]
+    except (requests.exceptions.RequestException, OSError, etree.LxmlError) as e:
+        print(f"Error fetching page URLs from {sitemap_url}: {e}")
+        return []
+
+def fetch_tag_pages(sitemap_url):
+    tag_page_urls = [url for url in iter_sitemap_urls(sitemap_url) if is_tag_page(url)]
+    if not tag_page_urls:
+        print("No tag pages found in this sitemap.")
+    return tag_page_urls
@@ -0,0 +1,36 @@
+from urllib.parse import urlparse, urlunparse, parse_qs
+
+TAG_PAGE_MARKERS = ['/tag/', '/product-tag/', '/category-tag/']
+
+def is_tag_page(url):
+    return any(tag in url for tag in TAG_PAGE_MARKERS)
+
+def is_valid_url(url):
+    invalid_extensions = (
+        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp',  
+        '.mp4', '.avi', '.mov', '.mkv',                           
+        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip',         
+        '.rar', '.7z', '.exe'
+    )
+    try:
+        parsed = urlparse(url)
+        path = parsed.path.lower()
+        if 'cart' in path:
+            return True
+        if any(path.endswith(ext) for ext in invalid_extensions):
+            return False
+        query_params = parse_qs(parsed.query)
+        if 'add-to-cart' in query_params or any(key == 'action' for key in query_params.keys()):
+            return False
+        return True
+    except Exception:
+        return False
+
+def normalize_url(url, add_trailing_slash=False):
+    parsed = urlparse(url)
+    normalized_path = parsed.path.rstrip('/')
+    if add_trailing_slash:
+        normalized_path += '/' if not normalized_path.endswith('/') else ''
+    else:
+        normalized_path = normalized_path.rstrip('/')
+    return urlunparse(parsed._replace(fragment='', path=normalized_path))
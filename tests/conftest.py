@@ -0,0 +1,9 @@
+import pytest
+
+from benchmarks.synthetic_site import site_config, start_server
+
+@pytest.fixture(scope='module')
+def site():
+    server, base = start_server(site_config(pages=60, slow_percent=0, trap_depth=3))
+    yield base
+    server.shutdown()
@@ -0,0 +1,7 @@
+from crawler.crawl import crawl_website
+
+def test_crawl_website_returns_an_ordered_list(site):
+    urls = crawl_website(site + '/')
+    assert type(urls) is list
+    assert urls[:2] == [site, site + '/p/1']
+    assert len(set(urls)) == len(urls) > 60
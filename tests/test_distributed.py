@@ -0,0 +1,50 @@
+import multiprocessing
+import os
+
+import pytest
+
+from crawler.distributed import MemoryFrontier, distributed_process_url, host_partition, seed_frontier, serve_frontier
+from crawler.pipeline import can_start_processes
+from crawler.process import process_url
+
+def exit_in_partition(partition):
+    if multiprocessing.current_process().name == f'crawl-partition-{partition}':
+        os._exit(3)
+
+def record_parse_processes(path):
+    with open(path, 'a') as f:
+        f.write(f'{can_start_processes()}\n')
+
+def page_statuses(data):
+    return {url: page['status'] for url, page in data['pages'].items()}
+
+@pytest.mark.parametrize('backend', ['sqlite', 'tcp'])
+def test_local_workers_match_single_process_crawl(site, backend):
+    single = process_url(site + '/', check_links=False, politeness=False)
+    distributed = distributed_process_url(site + '/', workers=3, backend=backend, check_links=False, politeness=False)
+    assert len(single['pages']) > 60
+    assert page_statuses(distributed) == page_statuses(single)
+
+def test_partition_workers_parse_in_processes(site, tmp_path):
+    single = process_url(site + '/', check_links=False, politeness=False)
+    path = tmp_path / 'parse-processes'
+    distributed = distributed_process_url(site + '/', workers=2, check_links=False, politeness=False, parse_workers=2,
+                                          initializer=record_parse_processes, initargs=(str(path),))
+    assert path.read_text().split() == ['True', 'True']
+    assert {url: page['meta'] for url, page in distributed['pages'].items()} == {url: page['meta'] for url, page in single['pages'].items()}
+
+def test_redirecting_start_url_seeds_its_target(site):
+    seeds, _, _, config = seed_frontier(site + '/', "Website URL")
+    assert seeds == [site, site + '/p/0']
+    assert config['scopes'] == [site + '/']
+
+def test_dead_worker_fails_the_crawl(site):
+    # The whole synthetic site is one host, so killing its partition's worker would otherwise leave its URLs queued forever.
+    with pytest.raises(RuntimeError, match='exited with code 3'):
+        distributed_process_url(site + '/', workers=2, check_links=False, politeness=False,
+                                initializer=exit_in_partition, initargs=(host_partition(site, 2),))
+
+def test_frontier_beyond_loopback_needs_an_authkey(monkeypatch):
+    monkeypatch.setattr('crawler.distributed.CLUSTER_AUTHKEY', None)
+    with pytest.raises(ValueError, match='authkey'):
+        serve_frontier(MemoryFrontier(1), ('0.0.0.0', 0))
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from crawler.htmlparse import ALL_FIELDS, create_extractor, empty_result, extract_html
+from crawler.neardup import normalize_tokens
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'html'
+FIXTURE_NAMES = sorted(path.name for path in FIXTURES.glob('*.html'))
+
+def read_fixture(name):
+    return (FIXTURES / name).read_bytes()
+
+def comparable(result):
+    # Page text only feeds the content signature, which works on word tokens, so whitespace differences between the engines do not matter.
+    return dict(result, text=normalize_tokens(result['text']))
+
+def extract_chunked(content, chunk_size, fields=ALL_FIELDS):
+    extractor = create_extractor(fields=fields)
+    for start in range(0, len(content), chunk_size):
+        if extractor.feed(content[start:start + chunk_size]):
+            break
+    return extractor.close()
+
+@pytest.mark.parametrize('name', FIXTURE_NAMES)
+def test_engines_agree(name):
+    content = read_fixture(name)
+    assert comparable(extract_html(content, engine='lxml')) == comparable(extract_html(content, engine='html.parser'))
+
+@pytest.mark.parametrize('name', FIXTURE_NAMES)
+def test_chunked_feed_matches_single_feed(name):
+    content = read_fixture(name)
+    assert extract_chunked(content, 7) == extract_html(content)
+
+@pytest.mark.parametrize('name', ['empty.html', 'whitespace.html'])
+def test_empty_documents_give_empty_result(name):
+    assert extract_html(read_fixture(name)) == empty_result()
+
+def test_nested_headings_keep_document_order():
+    result = extract_html(read_fixture('nested_h1.html'))
+    assert result['h1'] == ['OuterInner', 'Inner']
+    assert result['h2'] == ['OneTwo', 'Two']
+
+def test_template_headings_are_ignored():
+    assert extract_html(read_fixture('template.html'))['h1'] == ['Real heading']
+
+def test_control_characters_are_dropped():
+    result = extract_html(read_fixture('null_bytes.html'))
+    assert result['title'] == 'ab'
+    assert result['h1'] == ['xy']
+
+def test_undeclared_latin1_falls_back_to_windows_1252():
+    result = extract_html(read_fixture('latin1.html'))
+    assert result['title'] == 'Caf\xe9 cr\xe8me'
+    assert result['h1'] == ['D\xe9j\xe0 vu']
+
+def test_declared_charset_wins_over_content():
+    assert extract_html(read_fixture('wrong_charset.html'))['title'] == 'Caf�'
@@ -0,0 +1,28 @@
+import requests
+
+from crawler import http_client
+from crawler.http_client import RESPONSE_CACHE_LOW_WATER, ResponseCache
+
+def cached_response(etag):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['ETag'] = etag
+    return response
+
+def test_full_cache_evicts_oldest_entries_to_the_low_water_mark(tmp_path, monkeypatch):
+    clock = iter(range(1_000_000))
+    monkeypatch.setattr(http_client.time, 'time', lambda: float(next(clock)))
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), max_bytes=10_000)
+    evictions = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: evictions.append(cache.total_bytes) or evict())
+    for index in range(500):
+        cache.store(f'http://example.com/{index}', cached_response(str(index)), body=bytes(100))
+    assert cache.total_bytes <= 10_000
+    # Each eviction frees a tenth of the cache, so it runs once per ten stores rather than on every store.
+    assert len(evictions) <= 500 * 100 / (10_000 * (1 - RESPONSE_CACHE_LOW_WATER)) + 1
+    assert cache.lookup('http://example.com/499') is not None
+    assert cache.lookup('http://example.com/0') is None
+    stored = cache.connection.execute('SELECT COUNT(*), SUM(size) FROM responses').fetchone()
+    assert stored[1] == cache.total_bytes and stored[0] * 100 == cache.total_bytes
+    cache.close()
@@ -0,0 +1,31 @@
+from crawler import extract, linkcheck
+from crawler.extract import analyze_page
+from crawler.linkcache import LinkStatusCache
+from crawler.linkcheck import LinkChecker
+
+def counting(monkeypatch, module, name):
+    calls = []
+    function = getattr(module, name)
+    monkeypatch.setattr(module, name, lambda url, *args, **kwargs: calls.append(url) or function(url, *args, **kwargs))
+    return calls
+
+def test_link_checked_once_is_not_requested_again(site, monkeypatch):
+    hops = counting(monkeypatch, linkcheck, 'request_hop')
+    cache = LinkStatusCache()
+    links = [f'{site}/p/1', f'{site}/missing/1']
+    first = LinkChecker(status_cache=cache).check(links)
+    second = LinkChecker(status_cache=cache).check(links)
+    assert {link: status for link, (status, _) in first.items()} == {links[0]: '200', links[1]: '404'}
+    assert {link: status for link, (status, _) in second.items()} == {links[0]: '200', links[1]: '404'}
+    assert sorted(hops) == sorted(links)
+    assert cache.stats()['hits'] == 2
+
+def test_page_status_from_the_link_cache_saves_the_request(site, monkeypatch):
+    cache = LinkStatusCache()
+    monkeypatch.setattr(extract, 'link_status_cache', cache)
+    requests = counting(monkeypatch, extract, 'http_get')
+    LinkChecker(status_cache=cache).check([f'{site}/missing/2'])
+    assert analyze_page(f'{site}/missing/2')['status'] == '404'
+    assert analyze_page(f'{site}/r/3')['status'] == 'redirect_301'
+    assert analyze_page(f'{site}/r/3')['status'] == 'redirect_301'
+    assert requests == [f'{site}/r/3']
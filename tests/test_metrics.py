@@ -0,0 +1,25 @@
+from crawler.extract import ImageSizeProbe
+from crawler.http_client import set_request_metrics
+from crawler.metrics import CrawlMetrics, metrics_rows
+from crawler.process import process_url
+
+def test_crawl_reports_the_caches_it_uses(site):
+    data = process_url(site + '/sitemap.xml', "Sitemap URL", metrics=CrawlMetrics(), politeness=False, parse_workers=0)
+    caches = data['metrics']['caches']
+    assert caches['link_check']['hits'] > 0 and caches['link_check']['misses'] > 0
+    assert caches['link_status']['hits'] + caches['link_status']['misses'] > 0
+    assert ('Caches', 'link_check hit rate', round(caches['link_check']['hit_rate'], 4)) in metrics_rows(data['metrics'])
+
+def test_image_probe_reports_repeated_images(site):
+    metrics = CrawlMetrics()
+    previous = set_request_metrics(metrics)
+    probe = ImageSizeProbe()
+    try:
+        images = [f'{site}/img/1.png', f'{site}/img/2.png']
+        probe.submit(images)
+        probe.submit(images[:1])
+        assert probe.oversized(site, images, limit=0) == [(site, image, probe.size(image)) for image in images]
+    finally:
+        probe.close()
+        set_request_metrics(previous)
+    assert metrics.snapshot()['caches']['image_size'] == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3}
@@ -0,0 +1,34 @@
+import numpy as np
+
+from crawler.neardup import (
+    MINHASH_PRIME,
+    content_signature,
+    current_signature,
+    decode_signatures,
+    estimated_similarity,
+    near_duplicate_groups,
+    permutation_seeds,
+    permuted_hashes,
+)
+
+def test_permuted_hashes_are_exact_modulo_the_prime():
+    hashes = np.random.default_rng(1).integers(0, 1 << 32, size=200, dtype=np.uint64)
+    hashes[0] = (1 << 32) - 1
+    multipliers, offsets = permutation_seeds
+    expected = [[(int(a) * int(x) + int(b)) % MINHASH_PRIME for a, b in zip(multipliers, offsets)] for x in hashes]
+    assert permuted_hashes(hashes).tolist() == expected
+
+def test_near_duplicate_matches_report_pairwise_similarity():
+    text = ' '.join(f'word{index}' for index in range(300))
+    texts = [text, text.replace('word100', 'changed'), text.replace('word200', 'other'), 'an unrelated page about something else entirely']
+    signatures = decode_signatures([content_signature(value) for value in texts])
+    groups, matches, similarities = near_duplicate_groups(signatures)
+    assert groups[0] == groups[1] == groups[2] != groups[3]
+    assert matches[3] == -1
+    for index in range(3):
+        assert similarities[index] == estimated_similarity(signatures, index, matches[index])
+
+def test_signatures_from_the_previous_hash_family_are_ignored():
+    assert current_signature(content_signature('some page text here'))
+    assert not current_signature('ab' * 256)
+    assert not current_signature(None)
@@ -0,0 +1,34 @@
+from crawler import pipeline
+from crawler.distributed import reported_page
+from crawler.metrics import CrawlMetrics
+from crawler.pipeline import PagePipeline
+from crawler.process import append_page_rows
+from crawler.results import NON_HTML_STATUS, PARSE_ERROR_STATUS, ResultStore
+
+def test_parse_failure_becomes_an_error_row(site, monkeypatch):
+    parse_page = pipeline.parse_page
+    def failing_parse_page(page_url, body, content_type=None):
+        if page_url.endswith('/p/2'):
+            raise ValueError('unparseable page')
+        return parse_page(page_url, body, content_type)
+    monkeypatch.setattr(pipeline, 'parse_page', failing_parse_page)
+    urls = [f'{site}/p/{page}' for page in range(4)]
+    metrics = CrawlMetrics()
+    with PagePipeline(fetch_workers=2, parse_workers=0, metrics=metrics) as page_pipeline:
+        pages = dict(page_pipeline.analyze((url, None, None) for url in urls))
+    assert list(pages) == urls
+    assert pages[urls[2]]['status'] == PARSE_ERROR_STATUS
+    assert 'content_hash' not in pages[urls[2]]
+    assert metrics.snapshot()['parse_errors'] == 1
+    assert all(pages[url]['status'] == '200_ok' and 'content_signature' in pages[url] for url in urls if url != urls[2])
+
+def test_non_html_documents_are_listed_but_not_analyzed(site):
+    urls = [f'{site}/p/1', f'{site}/img/1.png']
+    with PagePipeline(fetch_workers=2, parse_workers=0) as page_pipeline:
+        pages = dict(page_pipeline.analyze((url, None, None) for url in urls))
+    assert pages[urls[0]]['status'] == '200_ok'
+    assert pages[urls[1]]['status'] == NON_HTML_STATUS
+    assert reported_page(pages[urls[1]])
+    results = ResultStore()
+    append_page_rows(results, urls[1], pages[urls[1]])
+    assert [len(results.frame(table)) for table in ('pages', 'headers_h1', 'headers_h2')] == [1, 0, 0]
@@ -0,0 +1,44 @@
+import pytest
+import requests
+
+from crawler import robots
+from crawler.robots import ROBOTS_FAILURE_TTL, RobotsCache
+
+class RobotsSession:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.requests = 0
+
+    def get(self, url, timeout=None):
+        self.requests += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        response = requests.Response()
+        response.status_code, response._content = answer
+        return response
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(robots.time, 'time', lambda: now[0])
+    return now
+
+@pytest.mark.parametrize('failure', [(503, b''), requests.exceptions.ConnectionError('unreachable')])
+def test_unavailable_robots_txt_disallows_until_a_short_retry(monkeypatch, clock, failure):
+    session = RobotsSession(failure, (200, b'User-agent: *\nDisallow: /private\n'))
+    monkeypatch.setattr(robots, 'get_http_session', lambda: session)
+    cache = RobotsCache()
+    assert not cache.can_fetch('http://example.com/page')
+    clock[0] += ROBOTS_FAILURE_TTL - 1
+    assert not cache.can_fetch('http://example.com/page')
+    assert session.requests == 1
+    clock[0] += 2
+    assert cache.can_fetch('http://example.com/page')
+    assert not cache.can_fetch('http://example.com/private')
+    assert session.requests == 2
+
+def test_missing_robots_txt_allows_everything(monkeypatch, clock):
+    session = RobotsSession((404, b''))
+    monkeypatch.setattr(robots, 'get_http_session', lambda: session)
+    assert RobotsCache().can_fetch('http://example.com/page')